@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+
+TOKEN_VERSION_CLAIM = 'ver'
+TOKEN_VERSION_KEY = 'user-token-version:{}'
+REVOKED = -1
+
+
+class RoleAccessToken(AccessToken):
+    '''Токен доступа с ролью пользователя и версией токенов.
+       По нему права проверяются без запроса пользователя из базы.'''
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for name in User.TOKEN_FIELDS:
+            token[name] = getattr(user, name)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+def get_token_version(user_id):
+    '''Текущая версия токенов пользователя или REVOKED.
+       Значение кэшируется на TOKEN_VERSION_CACHE_TIMEOUT секунд и
+       читается из default: реплика могла еще не получить отзыв.'''
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            version = REVOKED
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def set_token_version(user_id, version):
+    cache.set(
+        TOKEN_VERSION_KEY.format(user_id), version,
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def load_full_user(user):
+    '''Догружает одним запросом поля, которых не было в токене.'''
+    deferred = user.get_deferred_fields()
+    if deferred:
+        user.refresh_from_db(fields=deferred)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    '''Аутентификация по токену RoleAccessToken без запроса к базе.
+       Пользователь собирается из полей токена, остальные поля
+       догружаются при первом обращении. Токены без этих полей
+       проверяются как обычно, с загрузкой пользователя.'''
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            loaded = {
+                api_settings.USER_ID_FIELD: user_id,
+                'token_version': validated_token[TOKEN_VERSION_CLAIM],
+                **{name: validated_token[name] for name in User.TOKEN_FIELDS},
+            }
+        except KeyError:
+            raise AuthenticationFailed(
+                'Токен не содержит данных пользователя',
+                code='token_not_valid'
+            )
+        if get_token_version(user_id) != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван', code='token_not_valid'
+            )
+        # from_db ждет значения в порядке полей модели.
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in loaded
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, field_names,
+            [loaded[name] for name in field_names]
+        )
@@ -0,0 +1,132 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Пространство имен, которое входит в каждый ключ: сбрасывает весь кэш.
+GLOBAL_NAMESPACE = 'all'
+VERSION_KEY = 'api-cache-version:{}'
+RESPONSE_KEY = 'api-response:{}:{}'
+HITS_KEY = 'api-cache-stats:hits'
+MISSES_KEY = 'api-cache-stats:misses'
+
+
+def reviews_namespace(title_id):
+    return f'reviews:{title_id}'
+
+
+def comments_namespace(review_id):
+    return f'comments:{review_id}'
+
+
+def get_cache():
+    return caches[settings.API_RESPONSE_CACHE_ALIAS]
+
+
+def get_versions(namespaces):
+    '''Текущие версии пространств имен кэша.
+       Отсутствующая версия создается из текущего времени, поэтому после
+       перезапуска или вытеснения ключа старые записи не совпадут.'''
+    cache = get_cache()
+    keys = [VERSION_KEY.format(name) for name in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(*namespaces):
+    '''Делает недействительными все ответы из указанных пространств.'''
+    get_cache().set_many(
+        {VERSION_KEY.format(name): time.time_ns() for name in namespaces},
+        None
+    )
+
+
+def _incr(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def record_hit():
+    _incr(HITS_KEY)
+
+
+def record_miss():
+    _incr(MISSES_KEY)
+
+
+def get_stats():
+    values = get_cache().get_many((HITS_KEY, MISSES_KEY))
+    return {
+        'hits': values.get(HITS_KEY, 0),
+        'misses': values.get(MISSES_KEY, 0),
+    }
+
+
+def request_fingerprint(request, *extra):
+    '''Хэш хоста, пути и параметров запроса в упорядоченном виде.
+       Подходит и для запроса DRF, и для HttpRequest.'''
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        for value in values
+    )
+    raw = '|'.join((
+        request.get_host(), request.path, urlencode(params), *extra
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def build_key(request, namespaces):
+    '''Ключ ответа: версии пространств и отпечаток запроса.'''
+    versions = get_versions((GLOBAL_NAMESPACE, *namespaces))
+    return RESPONSE_KEY.format(
+        '.'.join(map(str, versions)), request_fingerprint(request)
+    )
+
+
+# Бэкенды, которые хранят данные в памяти одного процесса.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_enabled(value):
+    '''Значение настройки, а для None - общий ли кэш у процессов:
+       сброс версии в одном процессе должны увидеть остальные.'''
+    if value is None:
+        backend = settings.CACHES[settings.API_RESPONSE_CACHE_ALIAS]
+        return backend['BACKEND'] not in LOCAL_BACKENDS
+    return value
+
+
+def response_cache_enabled():
+    return is_enabled(settings.API_RESPONSE_CACHE)
+
+
+def conditional_get_enabled():
+    return is_enabled(settings.API_CONDITIONAL_GET)
+
+
+def build_etag(request, namespaces, renderer_format):
+    '''ETag для условного GET из версий пространств имен или None,
+       если условные запросы выключены. Last-Modified не отдается:
+       версия меняется чаще, чем раз в секунду, и дата с точностью до
+       секунды позволила бы ответить 304 на измененные данные.'''
+    if not conditional_get_enabled():
+        return None
+    versions = get_versions((GLOBAL_NAMESPACE, *namespaces))
+    etag = request_fingerprint(
+        request, '.'.join(map(str, versions)), renderer_format
+    )
+    return f'"{etag}"'
@@ -1,19 +1,35 @@
+from django.db.models import Count
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
-from reviews.models import Title
+from reviews.models import Title, TitleGenre
+from reviews.registry import categories, genres
+from reviews.search import search_titles
+
+GENRE_MATCH_ANY = 'any'
+GENRE_MATCH_ALL = 'all'
 
 
 class TitleFilter(filters.FilterSet):
-    """Фильтр выборки произведений по определенным полям."""
+    """Фильтр выборки произведений по определенным полям.
+    Категория и жанры сравниваются по slug точно, можно передать
+    несколько значений через запятую. Поиск по части slug доступен
+    через category_contains и genre_contains."""
 
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=(
+            (GENRE_MATCH_ANY, 'Любой из жанров'),
+            (GENRE_MATCH_ALL, 'Все жанры'),
+        ),
+        method='filter_genre_match'
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    category_contains = filters.CharFilter(
+        method='filter_category_contains'
     )
+    genre_contains = filters.CharFilter(method='filter_genre_contains')
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='contains'
@@ -28,6 +44,68 @@ class TitleFilter(filters.FilterSet):
         fields = (
             'category',
             'genre',
+            'genre_match',
+            'category_contains',
+            'genre_contains',
             'name',
             'year'
         )
+
+    @staticmethod
+    def split_slugs(value):
+        return {slug.strip() for slug in value.split(',') if slug.strip()}
+
+    def filter_category(self, queryset, name, value):
+        category_ids = categories.get_ids(self.split_slugs(value))
+        return queryset.filter(category_id__in=category_ids)
+
+    def filter_category_contains(self, queryset, name, value):
+        return queryset.filter(
+            category_id__in=categories.get_ids_containing(value)
+        )
+
+    def filter_genre(self, queryset, name, value):
+        slugs = self.split_slugs(value)
+        genre_ids = genres.get_ids(slugs)
+        match_all = self.form.cleaned_data.get('genre_match') == (
+            GENRE_MATCH_ALL
+        )
+        if not genre_ids or match_all and len(genre_ids) < len(slugs):
+            return queryset.none()
+        title_ids = TitleGenre.objects.filter(
+            genre_id__in=genre_ids
+        ).order_by().values('title_id')
+        if match_all:
+            title_ids = title_ids.annotate(
+                genres=Count('genre_id', distinct=True)
+            ).filter(genres=len(genre_ids)).values('title_id')
+        return queryset.filter(id__in=title_ids)
+
+    def filter_genre_match(self, queryset, name, value):
+        # Режим учитывается в filter_genre.
+        return queryset
+
+    def filter_genre_contains(self, queryset, name, value):
+        return queryset.filter(id__in=TitleGenre.objects.filter(
+            genre_id__in=genres.get_ids_containing(value)
+        ).order_by().values('title_id'))
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск произведений по названию и описанию.
+    Результаты отсортированы по релевантности. Курсорная пагинация
+    сортирует по названию, поэтому вместе с поиском она отклоняется
+    ответом 400."""
+    search_params = ('q', 'search')
+    cursor_error = 'Курсорная пагинация недоступна при поиске.'
+
+    def filter_queryset(self, request, queryset, view):
+        for param in self.search_params:
+            text = request.query_params.get(param)
+            if text:
+                paginator = getattr(view, 'paginator', None)
+                use_keyset = getattr(paginator, 'use_keyset', None)
+                if use_keyset and use_keyset(request):
+                    raise ValidationError({param: self.cursor_error})
+                return search_titles(queryset, text)
+        return queryset
@@ -0,0 +1,279 @@
+import asyncio
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Замер текущего запроса; None, если запрос не попал в выборку.
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestTimer:
+    '''Счетчики одного запроса.'''
+    __slots__ = ('queries', 'sql', 'serialize', 'render', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.render_started = None
+
+
+def record_query(execute, sql, params, many, context):
+    '''Обертка execute_wrappers: считает запросы и их время, если
+       текущий запрос попал в выборку. Работает и при DEBUG=False.'''
+    timer = current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries += 1
+        timer.sql += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Обертка ставится на каждое соединение один раз: запросы вьюх,
+    # которые ASGI выполняет в других потоках, тоже учитываются,
+    # потому что контекст с current копируется в эти потоки.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsStore:
+    '''Скользящее окно метрик процесса: интервалы по
+       REQUEST_METRICS_SLOT секунд за последние REQUEST_METRICS_WINDOW.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}
+
+    @staticmethod
+    def empty():
+        return {
+            'count': 0, 'errors': 0, 'total': 0.0, 'queries': 0,
+            'sql': 0.0, 'serialize': 0.0, 'render': 0.0,
+            'histogram': [0] * (len(settings.REQUEST_METRICS_BUCKETS) + 1),
+        }
+
+    def record(self, key, timer, total, status_code):
+        slot = int(time.time() // settings.REQUEST_METRICS_SLOT)
+        bucket = bisect_left(settings.REQUEST_METRICS_BUCKETS, total * 1000)
+        with self.lock:
+            endpoints = self.slots.get(slot)
+            if endpoints is None:
+                endpoints = self.slots[slot] = {}
+                self.prune(slot)
+            stats = endpoints.get(key)
+            if stats is None:
+                stats = endpoints[key] = self.empty()
+            stats['count'] += 1
+            stats['errors'] += status_code >= 500
+            stats['total'] += total
+            stats['queries'] += timer.queries
+            stats['sql'] += timer.sql
+            stats['serialize'] += timer.serialize
+            stats['render'] += timer.render
+            stats['histogram'][bucket] += 1
+
+    def prune(self, slot):
+        oldest = slot - settings.REQUEST_METRICS_WINDOW // (
+            settings.REQUEST_METRICS_SLOT
+        )
+        for old in [old for old in self.slots if old <= oldest]:
+            del self.slots[old]
+
+    def merged(self):
+        '''Сумма интервалов окна по эндпоинтам.'''
+        now = int(time.time() // settings.REQUEST_METRICS_SLOT)
+        result = {}
+        with self.lock:
+            self.prune(now)
+            for endpoints in self.slots.values():
+                for key, stats in endpoints.items():
+                    total = result.setdefault(key, self.empty())
+                    for name, value in stats.items():
+                        if name == 'histogram':
+                            total[name] = [
+                                a + b for a, b in zip(total[name], value)
+                            ]
+                        else:
+                            total[name] += value
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.slots.clear()
+
+
+store = MetricsStore()
+
+
+def percentile(histogram, share):
+    '''Верхняя граница корзины гистограммы, в которую попадает
+       доля share запросов; None для последней, открытой корзины.'''
+    bounds = settings.REQUEST_METRICS_BUCKETS
+    needed = share * sum(histogram)
+    seen = 0
+    for bound, count in zip(bounds, histogram):
+        seen += count
+        if seen >= needed:
+            return bound
+    return None
+
+
+def milliseconds(value, count):
+    return round(value * 1000 / count, 2)
+
+
+def get_stats():
+    '''Метрики эндпоинтов процесса за окно: количество запросов в
+       выборке, средние задержка, число и время SQL-запросов, время
+       сериализации и рендеринга ответа (мс), оценки перцентилей и
+       гистограмма задержки.'''
+    bounds = [str(bound) for bound in settings.REQUEST_METRICS_BUCKETS]
+    return {
+        'sample_rate': settings.REQUEST_METRICS_SAMPLE_RATE,
+        'window': settings.REQUEST_METRICS_WINDOW,
+        'endpoints': {
+            key: {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'latency_ms': milliseconds(stats['total'], stats['count']),
+                'p50_ms': percentile(stats['histogram'], 0.5),
+                'p95_ms': percentile(stats['histogram'], 0.95),
+                'p99_ms': percentile(stats['histogram'], 0.99),
+                'queries': round(stats['queries'] / stats['count'], 2),
+                'sql_ms': milliseconds(stats['sql'], stats['count']),
+                'serialize_ms': milliseconds(
+                    stats['serialize'], stats['count']
+                ),
+                'render_ms': milliseconds(stats['render'], stats['count']),
+                'histogram': dict(
+                    zip([*bounds, '+Inf'], stats['histogram'])
+                ),
+            }
+            for key, stats in sorted(store.merged().items())
+        },
+    }
+
+
+def endpoint_name(request):
+    '''Имя маршрута с действием, например titles-list или
+       reviews-detail; для маршрутов без имени - шаблон пути.'''
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.url_name or match.route
+
+
+def server_timing(timer, total):
+    return ', '.join((
+        f'db;dur={timer.sql * 1000:.2f};desc="{timer.queries} SQL"',
+        f'serialize;dur={timer.serialize * 1000:.2f}',
+        f'render;dur={timer.render * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ))
+
+
+class RequestMetricsMiddleware:
+    '''Для доли REQUEST_METRICS_SAMPLE_RATE запросов считает число и
+       время SQL-запросов, время сериализации (SerializeTimingMixin) и
+       рендеринга ответа и общую задержку, пишет их в метрики эндпоинта
+       для /api/v1/stats/ и, если REQUEST_METRICS_SERVER_TIMING, в
+       заголовок Server-Timing. Остальные запросы проходят без замеров.'''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнает, что middleware работает асинхронно.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        started, timer, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, started, timer)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        started, timer, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, started, timer)
+
+    @staticmethod
+    def sampled():
+        rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def start():
+        timer = RequestTimer()
+        return time.perf_counter(), timer, current.set(timer)
+
+    @staticmethod
+    def finish(request, response, started, timer):
+        total = time.perf_counter() - started
+        key = endpoint_name(request)
+        if key is not None:
+            store.record(key, timer, total, response.status_code)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(timer, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после вьюхи: отсюда и до конца рендеринга.
+        timer = current.get()
+        if timer is not None:
+            timer.render_started = time.perf_counter()
+            response.add_post_render_callback(partial(rendered, timer))
+        return response
+
+
+@lru_cache(maxsize=None)
+def timed_serializer(serializer_class):
+    '''Подкласс сериализатора, который добавляет время to_representation
+       к замеру текущего запроса. Для many=True замеряется каждый
+       элемент: ListSerializer создает дочерний сериализатор этого
+       класса. В это время входят и запросы, которые делает сериализатор.'''
+    def to_representation(self, instance):
+        timer = current.get()
+        if timer is None:
+            return super(timed, self).to_representation(instance)
+        started = time.perf_counter()
+        try:
+            return super(timed, self).to_representation(instance)
+        finally:
+            timer.serialize += time.perf_counter() - started
+
+    timed = type(serializer_class.__name__, (serializer_class,), {
+        '__module__': serializer_class.__module__,
+        'to_representation': to_representation,
+    })
+    return timed
+
+
+def rendered(timer, response):
+    timer.render += time.perf_counter() - timer.render_started
@@ -1,11 +1,147 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response
 from rest_framework import filters, mixins, viewsets
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from api_yamdb.db.replicas import read_from_primary
+from reviews.deletion import soft_delete
+from . import cache, metrics
 
-class ListCreateDestroyViewSet(mixins.ListModelMixin,
+
+class SerializeTimingMixin:
+    """Для запросов в выборке метрик (api.metrics) время сериализации
+    считается отдельно от времени вьюхи и рендеринга."""
+
+    def get_serializer(self, *args, **kwargs):
+        if metrics.current.get() is None:
+            return super().get_serializer(*args, **kwargs)
+        serializer_class = metrics.timed_serializer(
+            self.get_serializer_class()
+        )
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class VersionedViewMixin:
+    """Пространства имен версий, от которых зависят ответы вьюсета.
+    Версии сбрасываются сигналами моделей в api.signals."""
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """Условные GET-запросы для list и retrieve: ETag берется из версий
+    пространств имен, тело ответа для проверки If-None-Match не
+    строится."""
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = cache.build_etag(
+            request, self.get_cache_namespaces(),
+            request.accepted_renderer.format
+        )
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CachedListMixin(VersionedViewMixin):
+    """Кэширует ответы list для анонимных GET-запросов.
+    Ключ строится из пути и параметров запроса и версий пространств
+    имен из get_cache_namespaces()."""
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if (request.method != 'GET' or request.user.is_authenticated
+                or not cache.response_cache_enabled()):
+            return handler(request, *args, **kwargs)
+        key = cache.build_key(request, self.get_cache_namespaces())
+        cached = cache.get_cache().get(key)
+        if cached is not None:
+            cache.record_hit()
+            data, status = cached
+            return Response(data, status=status, headers={'X-Cache': 'HIT'})
+        cache.record_miss()
+        # Ответ попадет в кэш под текущими версиями, поэтому он не
+        # должен строиться по отстающей реплике.
+        read_from_primary()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.get_cache().set(
+                key, (response.data, response.status_code),
+                settings.API_RESPONSE_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve для анонимных GET-запросов."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class BackgroundDeleteMixin:
+    """DELETE скрывает объект сразу, а его отзывы и комментарии
+    удаляются в фоне задачей purge_deleted (DELETE_IN_BACKGROUND)."""
+
+    def perform_destroy(self, instance):
+        if settings.DELETE_IN_BACKGROUND:
+            soft_delete(instance)
+        else:
+            instance.delete()
+
+
+class ListCreateDestroyViewSet(SerializeTimingMixin, CachedListMixin,
+                               mixins.ListModelMixin,
                                mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
-    """Вьюсет, позволяющий осуществлять GET, POST и DELETE запросы."""
+    """Вьюсет, позволяющий осуществлять GET, POST и DELETE запросы.
+    Если задан registry, список отдается из справочника процесса
+    без запроса к базе."""
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    registry = None
+
+    def list(self, request, *args, **kwargs):
+        if self.registry is None:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            self.list_from_registry, request, *args, **kwargs
+        )
+
+    def list_from_registry(self, request, *args, **kwargs):
+        objects = self.registry.search(
+            request.query_params.get(api_settings.SEARCH_PARAM, '')
+        )
+        page = self.paginate_queryset(objects)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(objects, many=True)
+        return Response(serializer.data)
@@ -1,7 +1,263 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
 
-COUNT_USER_PAGINATION = 1
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
+COUNT_USER_PAGINATION = settings.USER_PAGE_SIZE
+MAX_USER_PAGE_SIZE = 1000
+MAX_KEYSET_PAGE_SIZE = 100
 
-class UserPagination(PageNumberPagination):
+
+class KeysetPagination(BasePagination):
+    '''Курсорная пагинация по ключу из полей ordering.
+       Последнее поле ordering должно быть уникальным: курсор хранит
+       значения всех полей последней записи, и следующая страница
+       выбирается условием "строго после ключа", без OFFSET и COUNT.'''
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = MAX_KEYSET_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        fields = [self._get_field(queryset.model, name)
+                  for name in self.ordering]
+        values, reverse = self.decode_cursor(request, fields)
+
+        ordering = [self._direction(name, reverse) for name in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else values is not None
+        self.first_key = self._key(results[0], fields) if results else None
+        self.last_key = self._key(results[-1], fields) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            self.encode_cursor(self.last_key, reverse=False)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param,
+            self.encode_cursor(self.first_key, reverse=True)
+        )
+
+    def encode_cursor(self, key, reverse):
+        data = json.dumps({'k': key, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            key, reverse = data['k'], bool(data['r'])
+            # Ключ строит encode_cursor: список строк по полям сортировки.
+            # null и вложенные значения to_python пропустил бы в фильтр.
+            if not isinstance(key, list) or len(key) != len(fields) or any(
+                not isinstance(value, (str, int, float)) for value in key
+            ):
+                raise ValueError
+            values = [field.to_python(value)
+                      for field, value in zip(fields, key)]
+        except (TypeError, ValueError, KeyError, binascii.Error,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    @staticmethod
+    def _get_field(model, name):
+        return model._meta.get_field(name.lstrip('-'))
+
+    @staticmethod
+    def _direction(name, reverse):
+        if not reverse:
+            return name
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @staticmethod
+    def _key(obj, fields):
+        return [field.value_to_string(obj) for field in fields]
+
+    @staticmethod
+    def _after(ordering, values):
+        '''Условие "ключ строго после values" для составного ordering.'''
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+
+class OptionalKeysetPagination(BasePagination):
+    '''Пагинация по умолчанию с возможностью перейти на курсорную.
+       Курсорный режим включается параметром ?pagination=cursor,
+       дальше клиент идет по ссылкам next/previous с параметром cursor.'''
+    keyset_class = KeysetPagination
+    fallback_class = PageNumberPagination
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+
+    def __init__(self):
+        self.paginator = self.fallback_class()
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.paginator = self.keyset_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+
+class PublicationKeysetPagination(KeysetPagination):
+    ordering = ('-pub_date', 'id')
+
+
+class TitlePagination(OptionalKeysetPagination):
+    keyset_class = TitleKeysetPagination
+    fallback_class = LimitOffsetPagination
+
+
+class PublicationPagination(OptionalKeysetPagination):
+    keyset_class = PublicationKeysetPagination
+
+
+class UserPageNumberPagination(PageNumberPagination):
+    '''Постраничный вывод пользователей с настраиваемым размером.
+       С параметром ?count=false не выполняет COUNT: выбирается
+       на одну запись больше страницы, чтобы понять, есть ли следующая.'''
     page_size = COUNT_USER_PAGINATION
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_USER_PAGE_SIZE
+    count_query_param = 'count'
+
+    def skip_count(self, request):
+        return request.query_params.get(self.count_query_param) == 'false'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.counted = not self.skip_count(request)
+        if self.counted:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = _positive_int(
+                request.query_params.get(self.page_query_param, 1),
+                strict=True
+            )
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(results) > page_size
+        return results[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.counted:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.counted:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param, self.page_number + 1
+        )
+
+    def get_previous_link(self):
+        if self.counted:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+
+class UserKeysetPagination(KeysetPagination):
+    ordering = ('username',)
+    page_size = COUNT_USER_PAGINATION
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_USER_PAGE_SIZE
+
+
+class UserPagination(OptionalKeysetPagination):
+    '''Список пользователей для администратора: страницы с COUNT,
+       страницы без COUNT (?count=false) или курсор по username
+       (?pagination=cursor).'''
+    keyset_class = UserKeysetPagination
+    fallback_class = UserPageNumberPagination
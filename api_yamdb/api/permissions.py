@@ -13,7 +13,7 @@ class IsAuthorModerAdminOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ['PUT', 'PATCH', 'DELETE']:
             return (
-                obj.author == request.user
+                obj.author_id == request.user.id
                 or request.user.is_moderator
                 or request.user.is_admin
             )
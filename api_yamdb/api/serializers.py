@@ -1,12 +1,33 @@
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator, UniqueTogetherValidator
 
 from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.registry import categories, genres
 from reviews.validators import validate_username
 
 
+class RegistrySlugRelatedField(serializers.SlugRelatedField):
+    """Поле slug категории или жанра, которое ищет объект
+    в справочнике процесса, а не запросом к базе."""
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        kwargs.setdefault('queryset', registry.model.objects.all())
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        obj = self.registry.get(data)
+        if obj is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=data
+            )
+        return obj
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор объектов класса Category."""
     class Meta:
@@ -26,23 +47,31 @@ class TitleGETSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'review_count',
+            'description',
+            'genre',
+            'category'
+        )
 
 
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор объектов класса Title при небезопасных запросах."""
 
-    genre = serializers.SlugRelatedField(
-        queryset=Genre.objects.all(),
-        slug_field='slug',
+    genre = RegistrySlugRelatedField(
+        registry=genres,
         many=True
     )
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
-        slug_field='slug'
+    category = RegistrySlugRelatedField(
+        registry=categories
     )
 
     class Meta:
@@ -75,6 +104,49 @@ class TitleSerializer(serializers.ModelSerializer):
         """Определяет какой сериализатор будет применен."""
         return TitleGETSerializer(title).data
 
+    def create(self, validated_data):
+        return self.save_checked(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_checked(super().update, instance, validated_data)
+
+    def save_checked(self, save, *args):
+        """Справочник процесса может устареть до SLUG_REGISTRY_TTL:
+        категорию или жанр из него мог удалить другой процесс. Тогда
+        вставку отклоняет внешний ключ, справочники сбрасываются, а
+        клиент получает ту же ошибку, что и для неизвестного slug."""
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError:
+            categories.invalidate()
+            genres.invalidate()
+            errors = self.missing_slugs()
+            if errors:
+                raise serializers.ValidationError(errors)
+            raise
+
+    def missing_slugs(self):
+        errors = {}
+        for name, model in (('category', Category), ('genre', Genre)):
+            objs = self.validated_data.get(name)
+            if objs is None:
+                continue
+            if not isinstance(objs, list):
+                objs = [objs]
+            existing = set(model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True))
+            field = self.fields[name]
+            field = getattr(field, 'child_relation', field)
+            errors.update({
+                name: [field.error_messages['does_not_exist'].format(
+                    slug_name=field.slug_field, value=obj.slug
+                )]
+                for obj in objs if obj.pk not in existing
+            })
+        return errors
+
 
 class UserSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
@@ -118,31 +190,6 @@ class SignUpSerializer(serializers.Serializer):
     )
 
 
-class ReviewCreateSerializer(serializers.ModelSerializer):
-    """Сериализатор для создания отзывов"""
-    author = serializers.SlugRelatedField(
-        slug_field='username', read_only=True,
-    )
-    score = serializers.IntegerField(
-        min_value=1, max_value=10
-    )
-
-    class Meta:
-        model = Review
-        fields = (
-            'id', 'text', 'author', 'score', 'pub_date'
-        )
-        read_only = ('id',)
-
-    def validate(self, data):
-        request = self.context.get('request')
-        title = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(author=request.user, title=title).exists():
-            raise serializers.ValidationError('У вас уже есть отзыв'
-                                              'на это произведение')
-        return data
-
-
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для работ с отзывами"""
     author = serializers.SlugRelatedField(
@@ -160,6 +207,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             'author',
             'score',
             'pub_date',
+            'comment_count',
         )
         read_only = ('id',)
 
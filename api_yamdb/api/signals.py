@@ -0,0 +1,124 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save, pre_save)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_loaded, deleting_reviews, soft_deleted
+from .authentication import REVOKED, set_token_version
+from .cache import (GLOBAL_NAMESPACE, bump, comments_namespace,
+                    reviews_namespace)
+
+
+def bump_on_commit(*namespaces):
+    transaction.on_commit(partial(bump, *namespaces))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    bump_on_commit('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    bump_on_commit('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_titles(sender, **kwargs):
+    bump_on_commit('titles')
+
+
+@receiver(post_delete, sender=Title)
+def invalidate_deleted_title(sender, instance, **kwargs):
+    bump_on_commit('titles', reviews_namespace(instance.pk))
+
+
+@receiver(post_save, sender=Review)
+def invalidate_reviews(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг произведения, поэтому сбрасываются и titles.
+    bump_on_commit('titles', reviews_namespace(instance.title_id))
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_deleted_review(sender, instance, **kwargs):
+    bump_on_commit(
+        'titles',
+        reviews_namespace(instance.title_id),
+        comments_namespace(instance.pk),
+    )
+
+
+@receiver(pre_save, sender=Review)
+def invalidate_moved_review(sender, instance, **kwargs):
+    loaded_title_id = getattr(instance, '_loaded_rating', (None,))[0]
+    if loaded_title_id not in (None, instance.title_id):
+        bump_on_commit(reviews_namespace(loaded_title_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    if instance.review_id in deleting_reviews.get():
+        # Версии сбросит invalidate_deleted_review.
+        return
+    # comment_count отзыва есть в ответах со списком отзывов.
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = Review.objects.filter(
+            pk=instance.review_id
+        ).values_list('title_id', flat=True).first()
+    bump_on_commit(
+        comments_namespace(instance.review_id), reviews_namespace(title_id)
+    )
+
+
+@receiver(bulk_loaded)
+@receiver(post_migrate)
+def invalidate_everything(sender, **kwargs):
+    bump_on_commit(GLOBAL_NAMESPACE)
+
+
+@receiver(soft_deleted)
+def invalidate_soft_deleted(sender, **kwargs):
+    # Скрытые отзывы и комментарии могут быть в любых ответах, а
+    # удаляют произведения и пользователей редко.
+    bump_on_commit(GLOBAL_NAMESPACE)
+
+
+@receiver(post_save, sender=User)
+def update_token_version(sender, instance, **kwargs):
+    version = instance.token_version if instance.is_active else REVOKED
+    transaction.on_commit(partial(set_token_version, instance.pk, version))
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, created, **kwargs):
+    # Имя автора есть в ответах со списками отзывов и комментариев.
+    # Удаление пользователя сбрасывает все версии через soft_deleted.
+    loaded = getattr(instance, '_loaded_token_state', {})
+    if created or instance.deleted or loaded.get(
+        'username', instance.username
+    ) == instance.username:
+        return
+    title_ids = Review.objects.filter(
+        author=instance
+    ).values_list('title_id', flat=True).distinct()
+    review_ids = Comment.objects.filter(
+        author=instance
+    ).values_list('review_id', flat=True).distinct()
+    bump_on_commit(
+        *map(reviews_namespace, title_ids),
+        *map(comments_namespace, review_ids),
+    )
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens(sender, instance, **kwargs):
+    transaction.on_commit(partial(set_token_version, instance.pk, REVOKED))
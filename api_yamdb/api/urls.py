@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                     ReviewViewSet, TitleViewSet, UserViewSet,
-                    signup_user, get_token)
+                    export, signup_user, get_token, stats)
 
 app_name = 'api'
 
@@ -32,5 +32,7 @@ auth_patterns = [
 
 urlpatterns = [
     path('auth/', include(auth_patterns)),
+    path('stats/', stats),
+    path('export/<slug:table>/', export),
     path('', include(router.urls)),
 ]
@@ -1,8 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -11,18 +10,29 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
 
-from reviews.models import Category, Genre, Review, Title, User
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
-from .pagination import UserPagination
+from reviews import jobs
+from reviews.exporter import (EXPORT_TABLES, OUTPUTS, export_bytes,
+                              get_file_name)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.outbox import enqueue
+from reviews.registry import categories, genres
+from . import metrics
+from .authentication import RoleAccessToken, load_full_user
+from .cache import comments_namespace, get_stats, reviews_namespace
+from .filters import TitleFilter, TitleSearchFilter
+from .mixins import (BackgroundDeleteMixin, CachedListRetrieveMixin,
+                     ConditionalGetMixin, ListCreateDestroyViewSet,
+                     SerializeTimingMixin)
+from .pagination import (PublicationPagination, TitlePagination,
+                         UserPagination)
 from .permissions import AdminOrReadOnly, IsAdmin, IsAuthorModerAdminOrReadOnly
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, GetTokenSerializer,
-                          ReviewCreateSerializer, ReviewSerializer,
-                          SignUpSerializer, TitleGETSerializer,
-                          TitleSerializer, UserSerializer)
+                          ReviewSerializer, SignUpSerializer,
+                          TitleGETSerializer, TitleSerializer,
+                          UserSerializer)
 
 
 class CategoryViewSet(ListCreateDestroyViewSet):
@@ -31,6 +41,8 @@ class CategoryViewSet(ListCreateDestroyViewSet):
        Редактировать или удалять только админ.
     '''
     queryset = Category.objects.all()
+    registry = categories
+    cache_namespaces = ('categories',)
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnly,)
     pagination_class = LimitOffsetPagination
@@ -42,22 +54,27 @@ class GenreViewSet(ListCreateDestroyViewSet):
        Редактировать или удалять только админ.
     '''
     queryset = Genre.objects.all()
+    registry = genres
+    cache_namespaces = ('genres',)
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly,)
     pagination_class = LimitOffsetPagination
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(SerializeTimingMixin, ConditionalGetMixin,
+                   CachedListRetrieveMixin, BackgroundDeleteMixin,
+                   viewsets.ModelViewSet):
     '''Вьюсет для создания Произведений.
        Делать Get запрос может любой пользователь.
        Редактировать или удалять только админ.
     '''
     queryset = Title.objects.select_related(
-        'category').annotate(rating=Avg('reviews__score'))
+        'category').prefetch_related('genre')
     permission_classes = (AdminOrReadOnly,)
-    filter_backends = (filters.SearchFilter, DjangoFilterBackend)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
-    pagination_class = LimitOffsetPagination
+    pagination_class = TitlePagination
+    cache_namespaces = ('titles',)
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     def get_serializer_class(self):
@@ -67,7 +84,8 @@ class TitleViewSet(viewsets.ModelViewSet):
                 if self.request.method == 'GET' else TitleSerializer)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializeTimingMixin, BackgroundDeleteMixin,
+                  viewsets.ModelViewSet):
     '''Вьюсет для Пользователя. Доступ только у администратора'''
     http_method_names = ['get', 'post', 'head', 'delete', 'patch']
     queryset = User.objects.all()
@@ -84,16 +102,17 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def me(self, request):
+        user = load_full_user(request.user)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
 
         serializer = self.get_serializer(
-            request.user, data=request.data, partial=True
+            user, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
         if serializer.validated_data.get('role'):
-            serializer.validated_data['role'] = request.user.role
+            serializer.validated_data['role'] = user.role
         serializer.save()
         return Response(serializer.data)
 
@@ -117,7 +136,8 @@ def signup_user(request):
         raise serializers.ValidationError('Такой пользователь уже существует')
 
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    # Письмо отправит send_outbox, запрос не ждет почтовый сервер.
+    enqueue(
         'Регистрация завершена',
         settings.MESSAGE.format(
             confirmation_code,
@@ -143,7 +163,7 @@ def get_token(request):
         user = get_object_or_404(User, username=username)
 
         if default_token_generator.check_token(user, confirmation_code):
-            access = AccessToken.for_user(user)
+            access = RoleAccessToken.for_user(user)
             return Response(
                 {
                     'token': f'Bearer {access}',
@@ -156,46 +176,136 @@ def get_token(request):
     )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def stats(request):
+    '''Счетчики производительности API для администратора'''
+    return Response({
+        'response_cache': get_stats(),
+        'jobs': jobs.get_stats(),
+        'requests': metrics.get_stats(),
+    })
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export(request, table):
+    '''Потоковая выгрузка таблицы для администратора.
+       ?output=csv|ndjson - формат, ?compress=gzip - сжатие.
+       Параметр называется output, потому что format занят DRF.'''
+    model = EXPORT_TABLES.get(table)
+    if model is None:
+        raise Http404
+    output = request.query_params.get('output', 'csv')
+    if output not in OUTPUTS:
+        raise serializers.ValidationError(
+            {'output': [f'Допустимые значения: {", ".join(OUTPUTS)}']}
+        )
+    compress = request.query_params.get('compress') == 'gzip'
+    response = StreamingHttpResponse(
+        export_bytes(model, output, compress),
+        content_type=(
+            'application/gzip' if compress
+            else EXPORT_CONTENT_TYPES[output]
+        )
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{get_file_name(model, output, compress)}"'
+    )
+    return response
+
+
+class ReviewViewSet(SerializeTimingMixin, ConditionalGetMixin,
+                    CachedListRetrieveMixin, viewsets.ModelViewSet):
     """Отображение действий с отзывами"""
+    serializer_class = ReviewSerializer
     permission_classes = (IsAuthorModerAdminOrReadOnly,)
+    pagination_class = PublicationPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
-    def get_serializer_class(self):
-        return (ReviewCreateSerializer
-                if self.action == 'create' else ReviewSerializer)
+    def get_cache_namespaces(self):
+        return (reviews_namespace(self.kwargs.get('title_id')),)
 
     def get_queryset(self):
-        title = get_object_or_404(
-            Title, id=self.kwargs.get('title_id')
-        )
-        return title.reviews.select_related('author', 'title')
+        """Отзыв для чтения, изменения или удаления выбирается одним
+        запросом вместе с автором; для списка проверяется произведение.
+        Отзывы скрытых произведений и пользователей не показываются."""
+        title_id = self.kwargs.get('title_id')
+        if self.action == 'list':
+            get_object_or_404(Title, id=title_id)
+        return Review.objects.filter(
+            title_id=title_id, title__deleted=False, author__deleted=False
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title, id=self.kwargs.get('title_id')
-        )
-        serializer.save(title=title, author=self.request.user)
+        """Отзыв вставляется сразу, без предварительных проверок:
+        повторный отзыв отсекает ограничение unique_author, а
+        несуществующее произведение - внешний ключ. Скрытое
+        произведение обнаруживает обновление рейтинга, которое не
+        находит строку, и вставка откатывается. Только при ошибке
+        выясняется, какой из ответов вернуть."""
+        title_id = self.kwargs.get('title_id')
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    title_id=title_id, author=self.request.user
+                )
+        except Title.DoesNotExist:
+            raise Http404
+        except IntegrityError:
+            if not Title.objects.filter(id=title_id).exists():
+                raise Http404
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'У вас уже есть отзыв на это произведение'
+                ]
+            })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SerializeTimingMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     """Отображение действий с комментариями"""
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorModerAdminOrReadOnly,)
+    pagination_class = PublicationPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
+    def get_cache_namespaces(self):
+        return (comments_namespace(self.kwargs.get('review_id')),)
+
     def get_queryset(self):
-        review = get_object_or_404(
+        """Комментарий выбирается одним запросом вместе с автором,
+        принадлежность отзыва произведению проверяется в том же запросе;
+        для списка проверяется сам отзыв. Комментарии скрытых
+        пользователей и к скрытым отзывам не показываются."""
+        review_id = self.kwargs.get('review_id')
+        title_id = self.kwargs.get('title_id')
+        if self.action == 'list':
+            self.get_review()
+        return Comment.objects.filter(
+            review_id=review_id, review__title_id=title_id,
+            review__title__deleted=False, review__author__deleted=False,
+            author__deleted=False
+        ).select_related('author', 'review')
+
+    def get_review(self):
+        return get_object_or_404(
             Review,
             id=self.kwargs.get('review_id'),
             title_id=self.kwargs.get('title_id'),
+            title__deleted=False,
+            author__deleted=False,
         )
-        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title_id=self.kwargs.get('title_id'),
-        )
-        serializer.save(review=review, author=self.request.user)
+        # Комментарий и счетчик comment_count отзыва меняются вместе.
+        with transaction.atomic():
+            serializer.save(
+                review=self.get_review(), author=self.request.user
+            )
@@ -0,0 +1,28 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    '''SQLite с настройками соединения из OPTIONS:
+       pragmas - словарь PRAGMA, которые выполняются при открытии
+       каждого соединения (journal_mode, synchronous, mmap_size...);
+       transaction_mode - режим BEGIN для транзакций, например IMMEDIATE:
+       запись берет блокировку сразу и ждет ее по timeout, а не получает
+       "database is locked" при попытке поднять блокировку чтения.'''
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_KEY = 'db-replica-sticky:{}'
+
+# Состояние текущего запроса: None вне запроса, иначе словарь
+# {'primary': bool}. Вне запросов (команды, тесты) все идет в primary.
+request_state = ContextVar('db_request_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_READ_REPLICAS', ())
+
+
+def sticky_key(request):
+    '''Ключ привязки к primary для клиента или None для анонима.'''
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if not header:
+        return None
+    return STICKY_KEY.format(hashlib.sha256(header.encode()).hexdigest())
+
+
+def read_from_primary():
+    '''До конца текущего запроса чтения идут в default. Нужно для
+       данных, которые переживут запрос (кэш ответов): реплика может
+       отставать и вернуть строки до только что зафиксированной записи.'''
+    state = request_state.get()
+    if state is not None:
+        state['primary'] = True
+
+
+class ReplicaRouter:
+    '''Чтения безопасных запросов идут в случайную реплику из
+       DATABASE_READ_REPLICAS, все остальное - в default. После первой
+       записи в запросе чтения до его конца тоже идут в default.'''
+
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        replicas = get_replicas()
+        if state is None or state['primary'] or not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state['primary'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии default, объекты из них можно связывать.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in get_replicas()
+
+
+class ReplicaMiddleware:
+    '''Выбирает базу для запроса. Небезопасные методы работают только с
+       primary и после успешного ответа на DATABASE_REPLICA_STICKINESS
+       секунд привязывают клиента (по хэшу заголовка Authorization) к
+       primary, чтобы он сразу видел свои изменения.'''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнает, что middleware работает асинхронно.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+        key, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_state.reset(token)
+        return self.finish(request, key, response)
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+        key, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_state.reset(token)
+        return self.finish(request, key, response)
+
+    @staticmethod
+    def start(request):
+        key = sticky_key(request)
+        primary = request.method not in SAFE_METHODS or (
+            key is not None and cache.get(key)
+        )
+        return key, request_state.set({'primary': bool(primary)})
+
+    @staticmethod
+    def finish(request, key, response):
+        if (request.method not in SAFE_METHODS and key is not None
+                and response.status_code < 400):
+            cache.set(key, True, settings.DATABASE_REPLICA_STICKINESS)
+        return response
@@ -30,7 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api_yamdb.db.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,23 +67,142 @@ AUTH_USER_MODEL = 'reviews.User'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Письма отправляет команда send_outbox: пачками по EMAIL_OUTBOX_BATCH_SIZE
+# через одно соединение. Неудачные попытки повторяются через
+# EMAIL_OUTBOX_RETRY_DELAY секунд, с удвоением паузы.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_LEASE = 300
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Отложенные задачи выполняет команда run_worker: забирает по
+# JOBS_BATCH_SIZE задач на JOBS_LEASE секунд, повторяет упавшие через
+# JOBS_RETRY_DELAY секунд с удвоением паузы. Пропускная способность в
+# /api/v1/stats/ считается за последние JOBS_METRICS_WINDOW секунд,
+# завершенные задачи хранятся JOBS_KEEP_FINISHED секунд.
+JOBS_BATCH_SIZE = 10
+JOBS_LEASE = 300
+JOBS_RETRY_DELAY = 30
+JOBS_MAX_ATTEMPTS = 5
+JOBS_METRICS_WINDOW = 300
+JOBS_KEEP_FINISHED = 7 * 24 * 60 * 60
+
+# Произведения и пользователи, удаленные через API, сразу скрываются,
+# а их отзывы и комментарии удаляет задача purge_deleted пачками по
+# PURGE_BATCH_SIZE строк, каждая в своей транзакции.
+DELETE_IN_BACKGROUND = os.getenv(
+    'DELETE_IN_BACKGROUND', 'true'
+).lower() == 'true'
+PURGE_BATCH_SIZE = 500
+
 # Database
+# DATABASE_PROFILE=production включает WAL, IMMEDIATE-транзакции для
+# записи, ожидание блокировки вместо ошибки и постоянные соединения.
+
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'development')
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.getenv('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'api_yamdb.db',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            # Секунды ожидания блокировки записи (busy timeout).
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                # Отрицательное значение - размер в килобайтах.
+                'cache_size': -64 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# Реплики только для чтения: пути к копиям базы через запятую в
+# DATABASE_REPLICAS. Чтения безопасных запросов распределяются по ним,
+# после записи клиент DATABASE_REPLICA_STICKINESS секунд читает из
+# default.
+
+DATABASE_READ_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.db.replicas.ReplicaRouter']
+DATABASE_REPLICA_STICKINESS = 5
+
+# Cache
+# Для нескольких процессов укажите общий бэкенд, например
+# django.core.cache.backends.filebased.FileBasedCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api_yamdb',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TIMEOUT = 300
+# Кэш анонимных ответов и условные GET-запросы (ETag). Версии ответов
+# хранятся в кэше API_RESPONSE_CACHE_ALIAS, и при кэше в памяти процесса
+# другие процессы не видят сброса версии: отдавали бы устаревшие списки
+# и 304. None - включены, только если этот кэш общий для процессов.
+API_RESPONSE_CACHE = None
+API_CONDITIONAL_GET = None
+
+# Сколько секунд процесс доверяет закэшированной версии токенов
+# пользователя: столько живет отозванный токен при раздельных кэшах.
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+# Сколько секунд процесс доверяет справочнику категорий и жанров, если
+# его версия в кэше не менялась.
+SLUG_REGISTRY_TTL = 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
+USER_PAGE_SIZE = 100
+
+# Замеры запросов (api.metrics): доля запросов в выборке, окно и шаг
+# скользящих метрик в секундах, границы корзин гистограммы задержки в
+# миллисекундах. При 0 запросы проходят без замеров.
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.getenv('REQUEST_METRICS_SAMPLE_RATE', '1')
+)
+REQUEST_METRICS_WINDOW = 300
+REQUEST_METRICS_SLOT = 10
+REQUEST_METRICS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Заголовок Server-Timing раскрывает число и время SQL-запросов любому
+# клиенту, поэтому по умолчанию выключен.
+REQUEST_METRICS_SERVER_TIMING = (
+    os.getenv('REQUEST_METRICS_SERVER_TIMING', 'false').lower() == 'true'
+)
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from reviews.models import (Category, Genre, Title, User,
-                            TitleGenre, Review, Comment)
+                            TitleGenre, Review, Comment, EmailOutbox, Job)
 
 
 class CategoryAdmin(admin.ModelAdmin):
@@ -51,6 +51,26 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'to', 'subject', 'status',
+        'attempts', 'send_after', 'sent_at',
+    )
+    search_fields = ('to',)
+    list_filter = ('status',)
+    empty_value_display = '-пусто-'
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts',
+        'run_after', 'finished', 'duration',
+    )
+    search_fields = ('name',)
+    list_filter = ('name', 'status')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Title, TitleAdmin)
@@ -58,3 +78,5 @@ admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(User)
 admin.site.register(TitleGenre, TitleGenreAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
+admin.site.register(Job, JobAdmin)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        import reviews.signals  # noqa: F401
+        # Регистрация обработчиков задач для run_worker.
+        import reviews.deletion  # noqa: F401
+        import reviews.outbox  # noqa: F401
@@ -0,0 +1,63 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from reviews.models import Comment, Review, Title
+from reviews.ratings import rebuild_ratings, review_aggregate
+
+
+def change_comment_count(review_id, delta):
+    '''Атомарно сдвигает количество комментариев отзыва.'''
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def comment_aggregate():
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(
+                review=OuterRef('pk'), author__deleted=False
+            )
+            .order_by()
+            .values('review')
+            .annotate(value=Count('pk'))
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def rebuild_comment_counts(review_ids=None):
+    '''Пересчитывает количество комментариев одним UPDATE.
+       Без review_ids пересчитываются все отзывы.'''
+    reviews = Review.objects.all()
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=review_ids)
+    return reviews.update(comment_count=comment_aggregate())
+
+
+def find_drift():
+    '''id произведений и отзывов, у которых хранимые счетчики
+       расходятся с отзывами и комментариями в базе.'''
+    titles = Title.objects.annotate(
+        actual_sum=review_aggregate(Sum('score')),
+        actual_count=review_aggregate(Count('pk')),
+    ).exclude(
+        rating_sum=F('actual_sum'), rating_count=F('actual_count')
+    )
+    reviews = Review.objects.annotate(
+        actual_count=comment_aggregate()
+    ).exclude(comment_count=F('actual_count'))
+    return {
+        Title: list(titles.values_list('pk', flat=True)),
+        Review: list(reviews.values_list('pk', flat=True)),
+    }
+
+
+def repair(drift):
+    '''Пересчитывает счетчики объектов из find_drift.'''
+    return {
+        Title: rebuild_ratings(drift[Title]),
+        Review: rebuild_comment_counts(drift[Review]),
+    }
@@ -0,0 +1,108 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.deletion import Collector
+
+from reviews.jobs import job
+from reviews.models import Comment, Review, Title
+from reviews.signals import purging, soft_deleted
+
+# Зависимые строки по модели скрытого объекта, в порядке удаления:
+# сначала комментарии, чтобы удаление отзыва не тянуло их каскадом.
+DEPENDENTS = {
+    'reviews.title': lambda pk: (
+        Comment.objects.filter(review__title_id=pk).select_related('review'),
+        Review.objects.filter(title_id=pk),
+    ),
+    'reviews.user': lambda pk: (
+        Comment.objects.filter(author_id=pk).select_related('review'),
+        Comment.objects.filter(
+            review__author_id=pk
+        ).select_related('review'),
+        Review.objects.filter(author_id=pk),
+    ),
+}
+
+
+def hide_title_counters(pk):
+    '''Рейтинг скрытого произведения больше не показывается.'''
+    Title.all_objects.filter(pk=pk).update(rating_sum=0, rating_count=0)
+
+
+def hide_user_counters(pk):
+    '''Вычитает отзывы и комментарии скрытого пользователя из рейтинга
+       видимых произведений и из счетчиков комментариев. Каждый счетчик
+       меняется одним UPDATE с подзапросом по строкам пользователя; у
+       пользователя не больше одного отзыва на произведение.'''
+    reviews = Review.objects.filter(author_id=pk)
+    Title.objects.filter(pk__in=reviews.values('title_id')).update(
+        rating_sum=F('rating_sum') - Subquery(
+            reviews.filter(title_id=OuterRef('pk')).values('score')
+        ),
+        rating_count=F('rating_count') - 1,
+    )
+    comments = Comment.objects.filter(author_id=pk)
+    Review.objects.filter(pk__in=comments.values('review_id')).update(
+        comment_count=F('comment_count') - Subquery(
+            comments.filter(review_id=OuterRef('pk'))
+            .order_by()
+            .values('review_id')
+            .annotate(value=Count('pk'))
+            .values('value')
+        )
+    )
+
+
+HIDE_COUNTERS = {
+    'reviews.title': hide_title_counters,
+    'reviews.user': hide_user_counters,
+}
+
+
+def soft_delete(instance):
+    '''Скрывает произведение или пользователя сразу, а отзывы и
+       комментарии удаляет задача purge_deleted в фоне. Счетчики
+       меняются в той же транзакции, поэтому ответы API не учитывают
+       скрытые строки и до удаления.'''
+    with transaction.atomic():
+        instance.mark_deleted()
+        HIDE_COUNTERS[instance._meta.label_lower](instance.pk)
+        soft_deleted.send(sender=type(instance), instance=instance)
+        purge_deleted.delay(
+            model=instance._meta.label_lower, pk=instance.pk
+        )
+
+
+def delete_in_batches(queryset, batch_size):
+    '''Удаляет строки queryset пачками, каждую в своей транзакции,
+       чтобы не держать блокировку записи и не загружать все строки.
+       Сигналы удаления срабатывают как при обычном удалении, связи из
+       select_related queryset доступны им без запросов.'''
+    using = router.db_for_write(queryset.model)
+    deleted = 0
+    while True:
+        with transaction.atomic(using=using):
+            objs = list(queryset.using(using)[:batch_size])
+            if not objs:
+                return deleted
+            collector = Collector(using=using)
+            collector.collect(objs)
+            deleted += collector.delete()[0]
+
+
+@job('purge_deleted', atomic=False)
+def purge_deleted(model, pk, batch_size=None):
+    '''Задача: удаляет зависимые строки скрытого объекта, затем сам
+       объект. После сбоя продолжает с места остановки. Счетчики не
+       меняются: строки вычтены из них при скрытии.'''
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    token = purging.set(True)
+    try:
+        for queryset in DEPENDENTS[model](pk):
+            delete_in_batches(queryset, batch_size)
+        apps.get_model(model).all_objects.filter(
+            pk=pk, deleted=True
+        ).delete()
+    finally:
+        purging.reset(token)
@@ -0,0 +1,115 @@
+import csv
+import datetime
+import json
+import zlib
+from itertools import islice
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.importer import TABLES
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, User)
+
+EXPORT_CHUNK_SIZE = 2000
+OUTPUTS = ('csv', 'ndjson')
+
+# Колонки в том же виде, в каком их читает load_cvs_file.
+COLUMNS = {
+    User: ('id', 'username', 'email', 'role', 'bio', 'first_name',
+           'last_name'),
+    Category: ('id', 'name', 'slug'),
+    Genre: ('id', 'name', 'slug'),
+    Title: ('id', 'name', 'year', 'category', 'description'),
+    Review: ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    Comment: ('id', 'review_id', 'text', 'author', 'pub_date'),
+    TitleGenre: ('id', 'title_id', 'genre_id'),
+}
+
+# Фильтры строк, скрытых вместе с произведением или пользователем:
+# как и во вьюсетах, такие строки не выгружаются.
+VISIBLE = {
+    Review: {'title__deleted': False, 'author__deleted': False},
+    Comment: {
+        'author__deleted': False,
+        'review__title__deleted': False,
+        'review__author__deleted': False,
+    },
+    TitleGenre: {'title__deleted': False},
+}
+
+# Таблица для выгрузки по имени файла без расширения: titles -> Title.
+EXPORT_TABLES = {
+    Path(file_name).stem: model for model, file_name in TABLES.items()
+}
+
+
+def get_file_name(model, output, compress=False):
+    name = f'{Path(TABLES[model]).stem}.{output}'
+    return f'{name}.gz' if compress else name
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def export_rows(model):
+    '''Строки таблицы в порядке id без скрытых. Читаются из базы частями
+       через iterator(), поэтому расход памяти не зависит от размера
+       таблицы.'''
+    attnames = [
+        model._meta.get_field(column).attname for column in COLUMNS[model]
+    ]
+    return model.objects.filter(**VISIBLE.get(model, {})).order_by(
+        'pk'
+    ).values_list(*attnames).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    '''Файл для csv.writer, который возвращает строку вместо записи.'''
+    def write(self, value):
+        return value
+
+
+def csv_lines(model):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS[model])
+    for row in export_rows(model):
+        yield writer.writerow([to_text(value) for value in row])
+
+
+def ndjson_lines(model):
+    columns = COLUMNS[model]
+    for row in export_rows(model):
+        yield json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False,
+            cls=DjangoJSONEncoder
+        ) + '\n'
+
+
+def export_chunks(model, output):
+    '''Текст выгрузки частями по EXPORT_CHUNK_SIZE строк.'''
+    lines = csv_lines(model) if output == 'csv' else ndjson_lines(model)
+    while True:
+        chunk = ''.join(islice(lines, EXPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_bytes(model, output, compress=False):
+    '''Выгрузка в байтах, при compress - в формате gzip.'''
+    if not compress:
+        for chunk in export_chunks(model, output):
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in export_chunks(model, output):
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
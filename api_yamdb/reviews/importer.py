@@ -0,0 +1,389 @@
+import csv
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from multiprocessing import Manager
+
+import django
+from django.apps import apps
+from django.db import connections, models, transaction
+from django.db.models import F
+
+from reviews.counters import rebuild_comment_counts
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, User)
+from reviews.ratings import rebuild_ratings
+from reviews.signals import bulk_loaded
+
+CHUNK_SIZE = 5000
+
+# Порядок загрузки определяется внешними ключами моделей, см. get_levels.
+TABLES = {
+    User: 'users.csv',
+    Category: 'category.csv',
+    Genre: 'genre.csv',
+    Title: 'titles.csv',
+    Review: 'review.csv',
+    Comment: 'comments.csv',
+    TitleGenre: 'genre_title.csv',
+}
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+# Ключи для файлов без колонки id.
+NATURAL_KEYS = {
+    User: 'username',
+    Category: 'slug',
+    Genre: 'slug',
+}
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    '''Временно отключает auto_now_add, чтобы сохранить даты из файла.'''
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def get_dependencies(tables):
+    '''Граф зависимостей: модель -> модели, на которые она ссылается.'''
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in tables
+            and field.related_model is not model
+        }
+        for model in tables
+    }
+
+
+def get_levels(tables):
+    '''Разбивает модели на уровни: модели одного уровня не зависят друг от
+       друга, а все их родители находятся на предыдущих уровнях.'''
+    dependencies = get_dependencies(tables)
+    levels, loaded = [], set()
+    while len(loaded) < len(dependencies):
+        level = [
+            model for model, parents in dependencies.items()
+            if model not in loaded and parents <= loaded
+        ]
+        if not level:
+            raise ValueError('Циклическая зависимость между таблицами')
+        levels.append(level)
+        loaded.update(level)
+    return levels
+
+
+def convert(field, value):
+    if value == '' and field.null and not isinstance(field, TEXT_FIELDS):
+        return None
+    if field.is_relation:
+        field = field.target_field
+    return field.to_python(value)
+
+
+def read_file(model, path, chunk_size):
+    '''Читает файл частями и возвращает строки в виде словарей
+       attname -> значение поля. Ссылки на другие таблицы не проверяются.'''
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=',')
+        columns = [
+            (column, model._meta.get_field(column))
+            for column in reader.fieldnames
+        ]
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield [
+                {
+                    field.attname: convert(field, row[column])
+                    for column, field in columns
+                }
+                for row in chunk
+            ]
+
+
+def parse_file(label, path, chunk_size, results):
+    '''Выполняется в процессе пула: разбирает файл и передает части
+       записывающему процессу через ограниченную очередь results.'''
+    try:
+        for rows in read_file(apps.get_model(label), path, chunk_size):
+            results.put((label, rows))
+    except Exception as error:
+        results.put((label, ValueError(str(error))))
+    else:
+        results.put((label, None))
+
+
+class ImportStats:
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.rows = 0
+        self.skipped = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.started = time.monotonic()
+
+    @property
+    def processed(self):
+        return self.rows + self.updated + self.unchanged
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed else 0.0
+
+
+class CsvImporter:
+    '''Потоковая загрузка CSV: файл читается частями по chunk_size строк,
+       каждая часть вставляется bulk_create в отдельной транзакции.
+       Внешние ключи проверяются по заранее загруженным множествам id
+       родительских таблиц, строки с неизвестными ссылками пропускаются.
+       В памяти одновременно находится не больше одной части файла.
+       В режиме upsert строки сопоставляются с базой по id или по
+       естественному ключу из NATURAL_KEYS, и повторная загрузка того же
+       файла ничего не меняет.'''
+
+    def __init__(self, data_dir, chunk_size=CHUNK_SIZE, progress=None,
+                 upsert=False):
+        self.data_dir = data_dir
+        self.chunk_size = chunk_size
+        self.upsert = upsert
+        self.progress = progress or (lambda stats: None)
+        self.known_ids = {}
+
+    def get_known_ids(self, model):
+        if model not in self.known_ids:
+            # Скрытые до удаления строки тоже занимают ключи.
+            self.known_ids[model] = set(
+                model._base_manager.values_list('pk', flat=True)
+            )
+        return self.known_ids[model]
+
+    def check_refs(self, model, rows, stats):
+        '''Отбрасывает строки со ссылками на несуществующие записи.'''
+        refs = [
+            (field.attname, self.get_known_ids(field.related_model))
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.attname in rows[0]
+        ]
+        checked = [
+            data for data in rows
+            if all(data[name] is None or data[name] in known
+                   for name, known in refs)
+        ]
+        stats.skipped += len(rows) - len(checked)
+        return checked
+
+    def store(self, model, rows, stats):
+        rows = self.check_refs(model, rows, stats)
+        if rows:
+            if self.upsert:
+                key = self.get_key(model, list(rows[0]))
+                self.upsert_chunk(model, rows, key, stats)
+            else:
+                self.write_chunk(model, rows, stats)
+        self.progress(stats)
+
+    def write_chunk(self, model, rows, stats):
+        with transaction.atomic():
+            model.objects.bulk_create([model(**data) for data in rows])
+        stats.rows += len(rows)
+
+    @staticmethod
+    def get_key(model, names):
+        if model._meta.pk.attname in names:
+            return model._meta.pk.attname
+        key = NATURAL_KEYS.get(model)
+        if key not in names:
+            raise ValueError(
+                f'В файле нет колонки id или {key or "естественного ключа"}'
+            )
+        return key
+
+    @staticmethod
+    def row_hash(values):
+        # CSV не различает NULL и пустую строку.
+        return hash(tuple('' if value is None else value for value in values))
+
+    def upsert_chunk(self, model, rows, key, stats):
+        '''Новые строки вставляются, измененные обновляются одним
+           bulk_update, совпадающие с базой по хэшу значений пропускаются.
+           Строки, скрытые до удаления (deleted), не меняются и считаются
+           пропущенными: purge_deleted скоро их удалит.'''
+        fields = [name for name in rows[0] if name != key]
+        columns = [key, 'pk', *fields]
+        soft_deleted = any(
+            field.name == 'deleted' for field in model._meta.fields
+        )
+        if soft_deleted:
+            columns.append('deleted')
+        existing, hidden = {}, set()
+        for row in model._base_manager.filter(
+            **{f'{key}__in': [data[key] for data in rows]}
+        ).values_list(*columns).iterator():
+            if soft_deleted and row[-1]:
+                hidden.add(row[0])
+            else:
+                existing[row[0]] = (
+                    row[1], self.row_hash(row[2:2 + len(fields)])
+                )
+        new, changed, skipped = [], [], 0
+        for data in rows:
+            if data[key] in hidden:
+                skipped += 1
+                continue
+            current = existing.get(data[key])
+            if current is None:
+                new.append(model(**data))
+            elif current[1] != self.row_hash(
+                data[name] for name in fields
+            ):
+                obj = model(**data)
+                obj.pk = current[0]
+                changed.append(obj)
+        update_fields = [
+            name for name in fields if name != model._meta.pk.attname
+        ]
+        if model is User and changed:
+            self.bump_token_versions(changed)
+            update_fields.append('token_version')
+        with transaction.atomic():
+            model.objects.bulk_create(new)
+            if changed and update_fields:
+                model.objects.bulk_update(changed, update_fields)
+        stats.rows += len(new)
+        stats.updated += len(changed)
+        stats.skipped += skipped
+        stats.unchanged += len(rows) - len(new) - len(changed) - skipped
+
+    @staticmethod
+    def bump_token_versions(users):
+        '''Отзывает токены пользователей, у которых изменились поля,
+           записанные в токен, как это делает User.save().'''
+        fields = [User._meta.get_field(name).attname
+                  for name in User.TOKEN_FIELDS]
+        current = {
+            row[0]: row[1:] for row in User._base_manager.filter(
+                pk__in=[user.pk for user in users]
+            ).values_list('pk', *fields)
+        }
+        for user in users:
+            values = tuple(getattr(user, name) for name in fields)
+            user.token_version = (
+                F('token_version') + 1 if values != current[user.pk]
+                else F('token_version')
+            )
+
+    def load_file(self, model, file_name):
+        stats = ImportStats(file_name)
+        with keep_auto_now_add(model):
+            for rows in read_file(
+                model, self.data_dir / file_name, self.chunk_size
+            ):
+                self.store(model, rows, stats)
+        self.finish(model)
+        return stats
+
+    def finish(self, model):
+        '''Действия, которые при save() выполняют сигналы моделей.'''
+        self.known_ids.pop(model, None)
+        if model is Review:
+            rebuild_ratings()
+        if model is Comment:
+            rebuild_comment_counts()
+        bulk_loaded.send(sender=model)
+
+    def load_all(self, tables, workers=1):
+        '''Загружает файлы по уровням get_levels. Возвращает генератор
+           (модель, имя файла, ImportStats, ошибка) по мере загрузки.'''
+        if workers > 1:
+            yield from self.load_parallel(tables, workers)
+            return
+        for level in get_levels(tables):
+            for model in level:
+                try:
+                    stats = self.load_file(model, tables[model])
+                except Exception as error:
+                    yield model, tables[model], None, error
+                else:
+                    yield model, tables[model], stats, None
+
+    def load_parallel(self, tables, workers):
+        '''Файлы одного уровня разбираются параллельно в пуле процессов,
+           а в базу их пишет только текущий процесс, через одно
+           соединение. Очередь ограничена, поэтому в памяти находится
+           не больше 2 * workers частей.'''
+        # Процессы пула не должны унаследовать открытые соединения.
+        connections.close_all()
+        with Manager() as manager, ProcessPoolExecutor(
+            workers, initializer=django.setup
+        ) as pool:
+            results = manager.Queue(maxsize=2 * workers)
+            for level in get_levels(tables):
+                yield from self.write_level(
+                    {model: tables[model] for model in level}, pool, results
+                )
+
+    def write_level(self, level, pool, results):
+        futures, stats, errors = {}, {}, {}
+        for model, file_name in level.items():
+            label = model._meta.label
+            futures[label] = pool.submit(
+                parse_file, label, self.data_dir / file_name,
+                self.chunk_size, results
+            )
+            stats[label] = ImportStats(file_name)
+        with ExitStack() as stack:
+            for model in level:
+                stack.enter_context(keep_auto_now_add(model))
+            while futures:
+                label, payload = self.receive(futures, results, errors)
+                if isinstance(payload, list):
+                    self.store_parsed(label, payload, stats, errors)
+                elif label is not None:
+                    if payload is not None:
+                        errors.setdefault(label, payload)
+                    del futures[label]
+        for model, file_name in level.items():
+            label = model._meta.label
+            if label in errors:
+                yield model, file_name, None, errors[label]
+                continue
+            self.finish(model)
+            yield model, file_name, stats[label], None
+
+    @staticmethod
+    def receive(futures, results, errors):
+        '''Следующее сообщение пула или (None, None) по таймауту.'''
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            pass
+        # Процесс пула мог завершиться, не отправив сообщение о конце.
+        for label, future in list(futures.items()):
+            if future.done() and future.exception():
+                errors.setdefault(label, future.exception())
+                del futures[label]
+        return None, None
+
+    def store_parsed(self, label, rows, stats, errors):
+        # Части файла с ошибкой дочитываются из очереди, но не пишутся.
+        if label in errors:
+            return
+        try:
+            self.store(apps.get_model(label), rows, stats[label])
+        except Exception as error:
+            errors[label] = error
@@ -0,0 +1,160 @@
+import json
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from reviews.models import Job
+from reviews.queue import LeaseQueue
+
+Statuses = Job.Statuses
+
+# Обработчики задач по имени типа, заполняются декоратором job.
+HANDLERS = {}
+
+
+def job(name, max_attempts=None, atomic=True):
+    '''Регистрирует функцию как обработчик задач типа name.
+       Аргументы задачи передаются функции именованными, поэтому они
+       должны сериализоваться в JSON. Поставить задачу в очередь:
+       func.delay(**kwargs) или enqueue(name, kwargs).
+       atomic=False - для задач, которые сами управляют транзакциями
+       и не должны держать блокировку записи, например ждут сеть.'''
+    def register(func):
+        func.job_name = name
+        func.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        func.atomic = atomic
+        func.delay = partial(delay, name)
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def get_key(name, payload):
+    return f'{name}:{json.dumps(payload, sort_keys=True)}'[:255]
+
+
+def enqueue(name, payload=None, run_after=None, unique=False):
+    '''Ставит задачу в очередь в текущей транзакции: если транзакция
+       откатится, задачи не будет. С unique новая задача не создается,
+       пока в очереди ждет такая же задача с теми же аргументами
+       и ее еще не забрал обработчик.'''
+    payload = payload or {}
+    key = get_key(name, payload) if unique else ''
+    if unique:
+        queued = Job.objects.filter(
+            key=key, status=Statuses.PENDING, locked_until__isnull=True
+        ).first()
+        if queued is not None:
+            return queued
+    return Job.objects.create(
+        name=name, payload=payload, key=key,
+        run_after=run_after or timezone.now()
+    )
+
+
+def delay(name, *, _unique=False, _run_after=None, **payload):
+    return enqueue(name, payload, run_after=_run_after, unique=_unique)
+
+
+queue = LeaseQueue(Job, 'run_after', 'JOBS_LEASE', 'JOBS_RETRY_DELAY')
+
+
+def claim(batch_size, names=None):
+    '''Забирает до batch_size задач, которые пора выполнить; с names -
+       только задачи этих типов.'''
+    if names:
+        return queue.claim(batch_size, name__in=names)
+    return queue.claim(batch_size)
+
+
+def retry_delay(attempts):
+    return queue.retry_delay(attempts)
+
+
+def run_job(item):
+    '''Выполняет задачу, по умолчанию в транзакции, и записывает результат.
+       Возвращает True, если задача выполнена.'''
+    item.attempts += 1
+    item.locked_until = None
+    handler = HANDLERS.get(item.name)
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f'Неизвестный тип задачи: {item.name}')
+        if handler.atomic:
+            with transaction.atomic():
+                handler(**item.payload)
+        else:
+            handler(**item.payload)
+    except Exception:
+        item.last_error = traceback.format_exc()
+        max_attempts = getattr(handler, 'max_attempts', 1)
+        if item.attempts >= max_attempts:
+            item.status = Statuses.FAILED
+            item.finished = timezone.now()
+        else:
+            item.run_after = timezone.now() + retry_delay(item.attempts)
+    else:
+        item.status = Statuses.DONE
+        item.finished = timezone.now()
+    item.duration = time.perf_counter() - started
+    item.save(update_fields=(
+        'attempts', 'locked_until', 'last_error', 'status',
+        'run_after', 'finished', 'duration',
+    ))
+    return item.status == Statuses.DONE
+
+
+def work(batch_size=None, names=None):
+    '''Одна пачка: забрать и выполнить. Возвращает (выполнено, ошибок).'''
+    done = failed = 0
+    for item in claim(batch_size or settings.JOBS_BATCH_SIZE, names):
+        if run_job(item):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def purge_finished(keep=None):
+    '''Удаляет завершенные задачи старше keep секунд.'''
+    keep = settings.JOBS_KEEP_FINISHED if keep is None else keep
+    deleted, _ = Job.objects.filter(
+        status__in=(Statuses.DONE, Statuses.FAILED),
+        finished__lt=timezone.now() - timedelta(seconds=keep),
+    ).delete()
+    return deleted
+
+
+def get_stats(window=None):
+    '''Очередь и пропускная способность по типам задач за последние
+       window секунд: сколько задач ждет, выполнено и не выполнено,
+       задач в секунду и среднее время выполнения в миллисекундах.'''
+    window = window or settings.JOBS_METRICS_WINDOW
+    recent = Q(finished__gte=timezone.now() - timedelta(seconds=window))
+    rows = Job.objects.order_by().values('name').annotate(
+        pending=Count('pk', filter=Q(status=Statuses.PENDING)),
+        retrying=Count(
+            'pk', filter=Q(status=Statuses.PENDING, attempts__gt=0)
+        ),
+        done=Count('pk', filter=recent & Q(status=Statuses.DONE)),
+        failed=Count('pk', filter=recent & Q(status=Statuses.FAILED)),
+        duration=Avg('duration', filter=recent & Q(status=Statuses.DONE)),
+    )
+    return {
+        row['name']: {
+            'pending': row['pending'],
+            'retrying': row['retrying'],
+            'done': row['done'],
+            'failed': row['failed'],
+            'per_second': round(row['done'] / window, 3),
+            'duration_ms': round((row['duration'] or 0) * 1000, 1),
+        }
+        for row in rows
+    }
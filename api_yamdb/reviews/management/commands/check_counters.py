@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.counters import find_drift, repair
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    """
+    Сверяет хранимые счетчики с данными в базе: рейтинг и количество
+    отзывов произведений, количество комментариев отзывов.
+    python manage.py check_counters
+    С --repair пересчитывает счетчики, которые разошлись.
+    """
+    help = 'Проверяет и исправляет счетчики отзывов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair', action='store_true',
+            help='Пересчитать разошедшиеся счетчики'
+        )
+
+    def handle(self, *args, **options):
+        drift = find_drift()
+        self.stdout.write(
+            f'Расхождения: произведений {len(drift[Title])}, '
+            f'отзывов {len(drift[Review])}'
+        )
+        if not any(drift.values()):
+            return
+        if not options['repair']:
+            raise CommandError(
+                'Счетчики разошлись, исправить: check_counters --repair'
+            )
+        repair(drift)
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны'))
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from reviews.exporter import (EXPORT_TABLES, OUTPUTS, export_bytes,
+                              get_file_name)
+
+
+class Command(BaseCommand):
+    """
+    Выгружает каталог в файлы того же вида, что читает load_cvs_file:
+    python manage.py dump_csv --path dump
+    Загрузить выгрузку обратно:
+    python manage.py load_cvs_file --path dump --upsert
+    """
+    help = 'Выгружает таблицы в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', type=Path, default=Path('dump'),
+            help='Каталог для файлов выгрузки'
+        )
+        parser.add_argument(
+            '--output', choices=OUTPUTS, default='csv',
+            help='Формат файлов'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы gzip'
+        )
+        parser.add_argument(
+            '--tables', nargs='+', choices=tuple(EXPORT_TABLES),
+            default=tuple(EXPORT_TABLES), help='Выгружаемые таблицы'
+        )
+
+    def handle(self, *args, **options):
+        options['path'].mkdir(parents=True, exist_ok=True)
+        for table in options['tables']:
+            model = EXPORT_TABLES[table]
+            file_name = get_file_name(
+                model, options['output'], options['gzip']
+            )
+            with open(options['path'] / file_name, 'wb') as file:
+                for data in export_bytes(
+                    model, options['output'], options['gzip']
+                ):
+                    file.write(data)
+            self.stdout.write(
+                self.style.SUCCESS(f'Таблица {table} выгружена в {file_name}')
+            )
@@ -1,12 +1,10 @@
-import csv
-
 import logging
+from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from reviews.models import (Category, Comment, Genre,
-                            TitleGenre, Review, Title, User)
+from reviews.importer import CHUNK_SIZE, TABLES, CsvImporter
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -15,61 +13,69 @@ logging.basicConfig(
     format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
 )
 
-TABLES = {
-    User: 'users.csv',
-    Category: 'category.csv',
-    Genre: 'genre.csv',
-    Title: 'titles.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv',
-    TitleGenre: 'genre_title.csv',
-}
-
 
 class Command(BaseCommand):
     """
     Для запуска команды создайте и примените миграции
     и примените команду python manage.py load_cvs_file
-    Базу нужно заполнить на чистую и только один раз.
-    Чтобы повторно заполнить базу - удалите файл db.sqlite3
-    и примените миграции, иначе будет ошибка.
+    Без --upsert базу нужно заполнять на чистую и только один раз.
+    С --upsert команду можно запускать повторно: новые строки
+    добавятся, измененные обновятся, остальные будут пропущены.
+    Файлы читаются частями по --chunk-size строк, поэтому
+    расход памяти не зависит от размера файлов. С --workers N
+    независимые файлы разбираются параллельно в N процессах.
     """
     help = 'Заполняет базу данных тестовыми данными'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Количество строк, вставляемых одной транзакцией'
+        )
+        parser.add_argument(
+            '--path', default=Path(settings.BASE_DIR) / 'static' / 'data',
+            type=Path, help='Каталог с CSV файлами'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Обновить существующие записи вместо ошибки'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов для разбора независимых файлов'
+        )
+
+    def report(self, stats):
+        message = (
+            f'{stats.file_name}: {stats.rows} строк, '
+            f'{stats.rate:.0f} строк/с'
+        )
+        if stats.updated or stats.unchanged:
+            message += (
+                f', обновлено {stats.updated}, '
+                f'без изменений {stats.unchanged}'
+            )
+        self.stdout.write(message)
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Начат импорт данных'))
-        for model, file_name in TABLES.items():
-            try:
-                with open(
-                    f'{settings.BASE_DIR}/static/data/{file_name}',
-                    newline='',
-                    encoding='utf-8'
-                ) as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=',')
-                    if file_name == 'titles.csv':
-                        for data in reader:
-                            category = Category.objects.get(
-                                pk=data.pop('category')
-                            )
-                            obj = model(
-                                category=category,
-                                **data
-                            )
-                            obj.save()
-                    elif file_name in ['review.csv', 'comments.csv']:
-                        for data in reader:
-                            user = User.objects.get(pk=data.pop('author'))
-                            obj = model(
-                                author=user,
-                                **data
-                            )
-                            obj.save()
-                    else:
-                        model.objects.bulk_create(
-                            [model(**data) for data in reader])
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Даннные {file_name} успешно загружены')
-                )
-            except Exception as error:
+        importer = CsvImporter(
+            options['path'], options['chunk_size'], progress=self.report,
+            upsert=options['upsert']
+        )
+        for _, file_name, stats, error in importer.load_all(
+            TABLES, options['workers']
+        ):
+            if error is not None:
                 logging.error(f'Ошибка при выполнении команды: {error}')
+                self.stderr.write(f'Ошибка загрузки {file_name}: {error}')
+                continue
+            if stats.skipped:
+                logging.warning(
+                    f'{file_name}: пропущено {stats.skipped} строк '
+                    'со ссылками на несуществующие записи'
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Даннные {file_name} успешно загружены')
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает хранимый рейтинг произведений по отзывам.
+    Нужна после загрузки данных в обход моделей
+    или для исправления расхождений:
+    python manage.py rebuild_ratings
+    С --background пересчет ставится в очередь run_worker.
+    """
+    help = 'Пересчитывает рейтинг всех произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Поставить пересчет в очередь задач'
+        )
+
+    def handle(self, *args, **options):
+        if options['background']:
+            rebuild_ratings.delay(_unique=True)
+            self.stdout.write('Пересчет рейтинга поставлен в очередь')
+            return
+        updated = rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {updated} произведений'
+        ))
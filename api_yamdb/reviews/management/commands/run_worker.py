@@ -0,0 +1,56 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from reviews.jobs import HANDLERS, purge_finished, work
+
+
+class Command(BaseCommand):
+    """
+    Выполняет отложенные задачи из очереди Job:
+    python manage.py run_worker
+    Команда работает, пока ее не остановят; с --once выполняет все
+    задачи, которые пора выполнить, и завершается. Можно запускать
+    несколько обработчиков одновременно, в том числе для разных
+    типов задач: --names send_outbox.
+    """
+    help = 'Выполняет отложенные задачи'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Задач, забираемых из очереди за раз'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--names', nargs='+', choices=sorted(HANDLERS),
+            help='Выполнять только задачи этих типов'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        totals = Counter()
+        started = time.perf_counter()
+        try:
+            while True:
+                done, failed = work(options['batch_size'], options['names'])
+                if done or failed:
+                    totals.update(done=done, failed=failed)
+                    continue
+                if options['once']:
+                    return
+                purge_finished()
+                time.sleep(options['interval'])
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Выполнено {totals["done"]}, ошибок {totals["failed"]}, '
+                f'{totals["done"] / elapsed:.1f} задач/с'
+            )
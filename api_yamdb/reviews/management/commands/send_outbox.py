@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import deliver
+
+
+class Command(BaseCommand):
+    """
+    Отправляет письма из очереди EmailOutbox:
+    python manage.py send_outbox
+    Команда работает, пока ее не остановят; с --once отправляет
+    все письма, которые пора отправить, и завершается.
+    Можно запускать несколько обработчиков одновременно.
+    """
+    help = 'Отправляет письма из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Писем за одно соединение с почтовым сервером'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить накопившиеся письма и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено {sent}, ошибок {failed}'
+                )
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 18:03
+
+from importlib import import_module
+
+from django.db import migrations, models
+import reviews.models
+
+# SQLite пересоздает таблицу reviews_title при добавлении поля, и
+# триггеры полнотекстового индекса из 0004 пропадают.
+search_index = import_module('reviews.migrations.0004_title_search_index')
+
+
+def recreate_search_index(apps, schema_editor):
+    search_index.drop_search_index(apps, schema_editor)
+    search_index.create_search_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_jobs'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздает таблицу.
+        migrations.RunPython(
+            migrations.RunPython.noop, recreate_search_index
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.VisibleUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='deleted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Удалено'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deleted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Удален'),
+        ),
+        migrations.RunPython(
+            recreate_search_index, migrations.RunPython.noop
+        ),
+    ]
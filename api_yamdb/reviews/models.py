@@ -1,7 +1,8 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from reviews.validators import validate_username
@@ -12,6 +13,21 @@ SLUG_VALIDATOR = RegexValidator(
 )
 
 
+class VisibleMixin:
+    '''Менеджер без записей, помеченных на удаление: их зависимые
+       строки еще удаляет задача purge_deleted.'''
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted=False)
+
+
+class VisibleManager(VisibleMixin, models.Manager):
+    pass
+
+
+class VisibleUserManager(VisibleMixin, UserManager):
+    pass
+
+
 class Category(models.Model):
     '''Категории (типы) произведений'''
     name = models.CharField(
@@ -85,15 +101,54 @@ class Title(models.Model):
         verbose_name='Категория',
         null=True
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+        editable=False
+    )
+    deleted = models.BooleanField(
+        'Удалено',
+        default=False,
+        editable=False
+    )
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Произведения'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        '''Средняя оценка по хранимым сумме и количеству оценок.'''
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def review_count(self):
+        '''У каждого отзыва есть оценка, поэтому отзывов столько же,
+           сколько оценок.'''
+        return self.rating_count
+
+    def mark_deleted(self):
+        '''Скрывает произведение до удаления задачей purge_deleted.'''
+        self.deleted = True
+        self.save(update_fields=('deleted',))
+
 
 class TitleGenre(models.Model):
     """Промежуточная класс, связывает жанры и произведения."""
@@ -109,6 +164,11 @@ class TitleGenre(models.Model):
 
     class Meta:
         ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['title', 'genre'], name='titlegenre_title_genre_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title} принадлежит жанру/ам {self.genre}'
@@ -157,6 +217,23 @@ class User(AbstractUser):
         choices=Roles.choices,
         default=Roles.USER
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False
+    )
+    deleted = models.BooleanField(
+        'Удален',
+        default=False,
+        editable=False
+    )
+
+    objects = VisibleUserManager()
+    all_objects = models.Manager()
+
+    # Поля, которые копируются в токен доступа: их изменение
+    # делает ранее выданные токены недействительными.
+    TOKEN_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
 
     class Meta:
         ordering = ('username',)
@@ -174,6 +251,43 @@ class User(AbstractUser):
             or self.is_superuser
         )
 
+    def mark_deleted(self):
+        '''Скрывает пользователя до удаления задачей purge_deleted:
+           токены отзываются, а username и email освобождаются для
+           новой регистрации. Такие значения не пройдут валидацию,
+           поэтому не совпадут с настоящими.'''
+        self.deleted = True
+        self.is_active = False
+        self.username = self.email = f'#deleted-{self.pk}'
+        self.save(update_fields=('deleted', 'is_active', 'username', 'email'))
+
+    def _token_state(self):
+        return {
+            name: self.__dict__[name]
+            for name in self.TOKEN_FIELDS if name in self.__dict__
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_token_state = instance._token_state()
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_token_state', None)
+        if loaded is not None:
+            current = self._token_state()
+            if any(current.get(name, value) != value
+                   for name, value in loaded.items()):
+                self.token_version += 1
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {
+                        *update_fields, 'token_version'
+                    }
+        super().save(*args, **kwargs)
+        self._loaded_token_state = self._token_state()
+
 
 class Review(models.Model):
     """Модель отзывов на произведения"""
@@ -199,6 +313,11 @@ class Review(models.Model):
         'Дата добавления',
         auto_now_add=True,
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         constraints = [
@@ -208,12 +327,33 @@ class Review(models.Model):
             )
         ]
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        '''Запоминает сохраненные в базе оценку и произведение,
+           чтобы при изменении отзыва пересчитать рейтинг на разницу.'''
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментариев к отзывам"""
@@ -239,8 +379,108 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text
+
+
+class EmailOutbox(models.Model):
+    """Очередь исходящих писем, их отправляет команда send_outbox."""
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', _('Ожидает отправки')
+        SENT = 'sent', _('Отправлено')
+        FAILED = 'failed', _('Не отправлено')
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Statuses.choices,
+        default=Statuses.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    send_after = models.DateTimeField('Отправить после', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занято обработчиком до',
+        null=True,
+        blank=True
+    )
+    claimed_by = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'send_after'],
+                name='outbox_status_send_after_idx'
+            ),
+        ]
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+
+class Job(models.Model):
+    """Отложенная задача, ее выполняет команда run_worker."""
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', _('Ожидает выполнения')
+        DONE = 'done', _('Выполнена')
+        FAILED = 'failed', _('Не выполнена')
+
+    name = models.CharField('Тип задачи', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    key = models.CharField(
+        'Ключ уникальности',
+        max_length=255,
+        blank=True,
+        db_index=True,
+        editable=False
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Statuses.choices,
+        default=Statuses.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    run_after = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_until = models.DateTimeField(
+        'Занята обработчиком до',
+        null=True,
+        blank=True
+    )
+    claimed_by = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+    duration = models.FloatField('Длительность, с', null=True, blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='job_status_run_after_idx'
+            ),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Min
+from django.utils import timezone
+
+from reviews.jobs import job
+from reviews.models import EmailOutbox
+from reviews.queue import LeaseQueue
+
+Statuses = EmailOutbox.Statuses
+
+
+def enqueue(subject, message, from_email, recipient_list):
+    '''Ставит письмо в очередь вместо отправки, по строке на получателя.
+       Аргументы те же, что у send_mail. Отправку выполнит send_outbox
+       или задача send_outbox в run_worker.'''
+    EmailOutbox.objects.bulk_create(
+        EmailOutbox(
+            subject=subject, body=message, from_email=from_email, to=to
+        )
+        for to in recipient_list
+    )
+    deliver_pending.delay(_unique=True)
+
+
+queue = LeaseQueue(
+    EmailOutbox, 'send_after', 'EMAIL_OUTBOX_LEASE', 'EMAIL_OUTBOX_RETRY_DELAY'
+)
+
+
+def claim(batch_size):
+    '''Забирает до batch_size писем, которые пора отправить.'''
+    return queue.claim(batch_size)
+
+
+def retry_delay(attempts):
+    return queue.retry_delay(attempts)
+
+
+def mark_failed(failures):
+    '''Записывает ошибки (письмо, исключение) и назначает повтор.'''
+    now = timezone.now()
+    for item, error in failures:
+        item.attempts += 1
+        item.last_error = str(error)
+        item.locked_until = None
+        item.send_after = now + retry_delay(item.attempts)
+        if item.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            item.status = Statuses.FAILED
+    EmailOutbox.objects.bulk_update(
+        [item for item, _ in failures],
+        ('attempts', 'last_error', 'locked_until', 'send_after', 'status')
+    )
+
+
+def send_batch(items):
+    '''Отправляет письма через одно соединение с почтовым сервером.
+       Возвращает количество отправленных и неотправленных писем.'''
+    sent, failed = [], []
+    try:
+        with get_connection() as connection:
+            for item in items:
+                try:
+                    EmailMessage(
+                        item.subject, item.body, item.from_email, [item.to],
+                        connection=connection
+                    ).send()
+                except Exception as error:
+                    failed.append((item, error))
+                else:
+                    sent.append(item.id)
+    except Exception as error:
+        # Не удалось открыть или закрыть соединение: неотправленные
+        # письма этой пачки уходят на повтор.
+        done = set(sent) | {item.id for item, _ in failed}
+        failed.extend(
+            (item, error) for item in items if item.id not in done
+        )
+    EmailOutbox.objects.filter(id__in=sent).update(
+        status=Statuses.SENT, sent_at=timezone.now(), locked_until=None,
+        attempts=F('attempts') + 1
+    )
+    if failed:
+        mark_failed(failed)
+    return len(sent), len(failed)
+
+
+def deliver(batch_size=None):
+    '''Одна пачка: забрать и отправить. Возвращает (отправлено, ошибок).'''
+    items = claim(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not items:
+        return 0, 0
+    return send_batch(items)
+
+
+@job('send_outbox', atomic=False)
+def deliver_pending():
+    '''Задача: отправить все письма, которые пора отправить.
+       Если остались письма для повтора, задача ставится снова
+       на время ближайшего из них.'''
+    while any(deliver()):
+        pass
+    retry_at = EmailOutbox.objects.filter(
+        status=Statuses.PENDING
+    ).aggregate(retry_at=Min('send_after'))['retry_at']
+    if retry_at is not None:
+        deliver_pending.delay(_unique=True, _run_after=retry_at)
@@ -0,0 +1,52 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+class LeaseQueue:
+    '''Очередь строк модели в базе, общая для писем (reviews.outbox) и
+       задач (reviews.jobs). Модель хранит status со значением
+       Statuses.PENDING для ожидающих строк, время готовности в поле
+       ready_field, срок аренды locked_until и метку claimed_by.
+       Срок аренды и начальная пауза повтора в секундах берутся из
+       настроек lease_setting и retry_setting при каждом вызове.'''
+
+    def __init__(self, model, ready_field, lease_setting, retry_setting):
+        self.model = model
+        self.ready_field = ready_field
+        self.lease_setting = lease_setting
+        self.retry_setting = retry_setting
+
+    def claim(self, batch_size, **filters):
+        '''Забирает до batch_size строк, которые пора обработать.
+           Строки занимаются условным UPDATE на срок аренды, поэтому
+           несколько обработчиков не получат одну строку, а строки
+           упавшего обработчика вернутся в очередь после окончания
+           срока. filters дополнительно ограничивают выборку.'''
+        now = timezone.now()
+        free = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        ids = list(
+            self.model.objects.filter(
+                free, status=self.model.Statuses.PENDING,
+                **{f'{self.ready_field}__lte': now}, **filters
+            ).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        lease = getattr(settings, self.lease_setting)
+        self.model.objects.filter(free, id__in=ids).update(
+            locked_until=now + timedelta(seconds=lease), claimed_by=token,
+        )
+        return list(self.model.objects.filter(id__in=ids, claimed_by=token))
+
+    def retry_delay(self, attempts):
+        '''Пауза перед следующей попыткой: удваивается с каждой неудачей.'''
+        return timedelta(
+            seconds=getattr(settings, self.retry_setting) * 2 ** (
+                attempts - 1
+            )
+        )
@@ -0,0 +1,44 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from reviews.jobs import job
+from reviews.models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    '''Атомарно сдвигает сумму и количество оценок произведения.
+       Возвращает 0, если произведения нет или оно скрыто.'''
+    return Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+def review_aggregate(aggregate):
+    # Отзывы скрытых пользователей в рейтинге не учитываются.
+    return Coalesce(
+        Subquery(
+            Review.objects.filter(
+                title=OuterRef('pk'), author__deleted=False
+            )
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+@job('rebuild_ratings')
+def rebuild_ratings(title_ids=None):
+    '''Пересчитывает рейтинг по отзывам одним UPDATE.
+       Без title_ids пересчитываются все произведения.'''
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    return titles.update(
+        rating_sum=review_aggregate(Sum('score')),
+        rating_count=review_aggregate(Count('pk')),
+    )
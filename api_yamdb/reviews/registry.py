@@ -0,0 +1,126 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from reviews.models import Category, Genre
+
+
+class SlugRegistry:
+    '''Справочник slug -> объект для небольших таблиц категорий и жанров.
+       Загружается лениво и живет в процессе SLUG_REGISTRY_TTL секунд.
+       Версия справочника хранится в кэше Django: после invalidate() в
+       любом процессе остальные процессы с общим кэшем перечитают
+       таблицу при следующем обращении. С кэшем в памяти процесса
+       устаревание ограничено TTL, а slug, которого нет в справочнике,
+       перед отказом ищется в базе.'''
+    fields = ('id', 'name', 'slug')
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'slug-registry:{model._meta.label_lower}'
+        self._lock = threading.Lock()
+        self._data = None
+
+    def __deepcopy__(self, memo):
+        # Справочник общий на процесс: поля сериализаторов копируются
+        # вместе с аргументами, но должны ссылаться на тот же объект.
+        return self
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def _is_fresh(self, data, version):
+        return data is not None and data[0] == version and (
+            time.monotonic() - data[3] < settings.SLUG_REGISTRY_TTL
+        )
+
+    def _load(self):
+        version = self._current_version()
+        data = self._data
+        if self._is_fresh(data, version):
+            return data[1], data[2]
+        with self._lock:
+            data = self._data
+            if not self._is_fresh(data, version):
+                rows = list(
+                    self.model.objects.values_list(*self.fields)
+                )
+                data = (
+                    version, rows, {row[2]: row for row in rows},
+                    time.monotonic(),
+                )
+                self._data = data
+            return data[1], data[2]
+
+    def _find_missing(self, by_slug, slugs):
+        '''Строки для slug, которых нет в справочнике, одним запросом.
+           Если что-то нашлось, справочник устарел и перечитывается при
+           следующем обращении.'''
+        missing = {slug for slug in slugs if slug not in by_slug}
+        if not missing:
+            return {}
+        found = {
+            row[2]: row for row in self.model.objects.filter(
+                slug__in=missing
+            ).values_list(*self.fields)
+        }
+        if found:
+            self._data = None
+        return found
+
+    def _build(self, row):
+        return self.model.from_db(DEFAULT_DB_ALIAS, self.fields, row)
+
+    def all(self):
+        '''Все объекты в порядке сортировки модели.'''
+        rows, _ = self._load()
+        return [self._build(row) for row in rows]
+
+    def get(self, slug):
+        '''Объект по slug или None.'''
+        _, by_slug = self._load()
+        row = by_slug.get(slug) or self._find_missing(
+            by_slug, (slug,)
+        ).get(slug)
+        return self._build(row) if row is not None else None
+
+    def get_ids(self, slugs):
+        '''id объектов с указанными slug, неизвестные slug пропускаются.'''
+        _, by_slug = self._load()
+        by_slug = {**by_slug, **self._find_missing(by_slug, slugs)}
+        return [by_slug[slug][0] for slug in slugs if slug in by_slug]
+
+    def get_ids_containing(self, part):
+        '''id объектов, slug которых содержит part без учета регистра.'''
+        rows, _ = self._load()
+        part = part.lower()
+        return [row[0] for row in rows if part in row[2].lower()]
+
+    def search(self, text):
+        '''Объекты, в названии которых есть все слова из text.'''
+        terms = text.replace(',', ' ').lower().split()
+        rows, _ = self._load()
+        return [
+            self._build(row) for row in rows
+            if all(term in row[1].lower() for term in terms)
+        ]
+
+    def invalidate(self):
+        cache.set(self.version_key, time.time_ns(), None)
+        self._data = None
+
+
+categories = SlugRegistry(Category)
+genres = SlugRegistry(Genre)
+
+REGISTRIES = {
+    Category: categories,
+    Genre: genres,
+}
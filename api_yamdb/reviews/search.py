@@ -0,0 +1,70 @@
+import re
+from functools import reduce
+from operator import and_
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+# Вес совпадений в названии и в описании для bm25.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_index_available = {}
+
+
+def search_index_available(using):
+    '''Есть ли в базе полнотекстовый индекс FTS5 по произведениям.'''
+    connection = connections[using]
+    key = (using, str(connection.settings_dict['NAME']))
+    if key not in _index_available:
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                    "AND name = %s",
+                    [FTS_TABLE]
+                )
+                available = cursor.fetchone() is not None
+        _index_available[key] = available
+    return _index_available[key]
+
+
+def get_terms(text):
+    return re.findall(r'\w+', text)
+
+
+def build_match_query(terms):
+    '''Запрос FTS5: все слова обязательны, каждое ищется по префиксу.
+       Слова берутся в кавычки, поэтому синтаксис FTS5 из пользовательского
+       ввода не интерпретируется.'''
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_titles(queryset, text):
+    '''Фильтрует произведения по словам из text и упорядочивает
+       по релевантности. Без FTS5 использует поиск по подстроке.'''
+    terms = get_terms(text)
+    if not terms:
+        return queryset.none()
+    if not search_index_available(queryset.db):
+        return queryset.filter(reduce(and_, (
+            Q(name__icontains=term) | Q(description__icontains=term)
+            for term in terms
+        )))
+    match = build_match_query(terms)
+    title_table = queryset.model._meta.db_table
+    # bm25 считается только внутри запроса с MATCH, поэтому ранг берется
+    # коррелированным подзапросом по rowid текущего произведения.
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+        f'AND {FTS_TABLE}.rowid = "{title_table}"."id"',
+        (match,), output_field=FloatField()
+    )
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,)
+    )).annotate(search_rank=rank).order_by('search_rank', 'id')
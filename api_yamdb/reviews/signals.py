@@ -0,0 +1,107 @@
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from reviews.counters import change_comment_count
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import change_rating, rebuild_ratings
+from reviews.registry import REGISTRIES
+
+# Отправляется после массовой загрузки строк модели в обход save(),
+# sender - класс модели.
+bulk_loaded = Signal()
+
+# Отправляется, когда объект скрыт до удаления в фоне (reviews.deletion),
+# sender - класс модели, instance - объект.
+soft_deleted = Signal()
+
+# Отзывы, которые сейчас удаляются: каскад удаляет их комментарии
+# раньше самих отзывов, и обновлять счетчики таких отзывов не нужно.
+deleting_reviews = ContextVar('deleting_reviews', default=frozenset())
+
+# Включается, пока purge_deleted удаляет строки скрытого объекта: они
+# уже вычтены из счетчиков при скрытии (reviews.deletion).
+purging = ContextVar('purging', default=False)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw=False,
+                                 **kwargs):
+    '''Обновляет рейтинг произведения при создании или изменении отзыва.
+       Отзыв на скрытое произведение вызывает Title.DoesNotExist: если
+       отзыв сохраняется в транзакции, вставка откатывается.'''
+    if raw:
+        return
+    loaded_title_id, loaded_score = getattr(
+        instance, '_loaded_rating', (None, None)
+    )
+    if created:
+        if not change_rating(instance.title_id, instance.score, 1):
+            raise Title.DoesNotExist
+    elif loaded_score is None:
+        # Объект создан не из базы: разницу не посчитать, пересчитываем.
+        rebuild_ratings([instance.title_id])
+    elif loaded_title_id != instance.title_id:
+        change_rating(loaded_title_id, -loaded_score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif loaded_score != instance.score:
+        change_rating(instance.title_id, instance.score - loaded_score, 0)
+    instance._loaded_rating = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    '''Убирает оценку удаленного отзыва из рейтинга произведения.'''
+    if purging.get():
+        return
+    title_id, score = getattr(instance, '_loaded_rating', (None, None))
+    if score is None:
+        title_id, score = instance.title_id, instance.score
+    change_rating(title_id, -score, -1)
+
+
+@receiver(pre_delete, sender=Review)
+def mark_deleting_review(sender, instance, **kwargs):
+    deleting_reviews.set(deleting_reviews.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=Review)
+def unmark_deleted_review(sender, instance, **kwargs):
+    deleting_reviews.set(deleting_reviews.get() - {instance.pk})
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, raw=False, **kwargs):
+    '''Увеличивает счетчик комментариев отзыва.'''
+    if created and not raw:
+        change_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    '''Уменьшает счетчик комментариев отзыва.'''
+    if purging.get():
+        return
+    if instance.review_id not in deleting_reviews.get():
+        change_comment_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(bulk_loaded)
+def invalidate_slug_registry(sender, **kwargs):
+    '''Сбрасывает справочник slug после фиксации изменений в базе.'''
+    registry = REGISTRIES.get(sender)
+    if registry is not None:
+        transaction.on_commit(registry.invalidate)
+
+
+@receiver(post_migrate)
+def invalidate_all_slug_registries(sender, **kwargs):
+    for registry in REGISTRIES.values():
+        registry.invalidate()
@@ -0,0 +1,166 @@
+'''Сравнение обработки чтений через WSGI и ASGI: запросы в секунду и p99.
+
+Запуск из корня репозитория:
+    python benchmarks/asgi_vs_wsgi.py --requests 2000 --concurrency 32
+
+Режимы: wsgi - вьюхи в пуле потоков; asgi - те же вьюхи под ASGI.
+Приложение вызывается в процессе, без сетевого сервера, на временной
+базе с данными из static/data. Доля запросов с уникальными параметрами,
+которые не попадают в кэш ответов, задается --unique (по умолчанию
+половина).
+'''
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
+MODES = ('wsgi', 'asgi')
+
+
+def setup_django(database):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'api_yamdb.settings'
+    os.environ['DATABASE_NAME'] = database
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Замер идет в одном процессе, поэтому кэш в памяти процесса общий.
+    settings.API_RESPONSE_CACHE = True
+
+    from reviews.importer import TABLES, CsvImporter
+    call_command('migrate', verbosity=0)
+    for _ in CsvImporter(PROJECT_DIR / 'static' / 'data').load_all(TABLES):
+        pass
+
+
+def make_urls(count, unique, seed=0):
+    from reviews.models import Title
+
+    rng = random.Random(seed)
+    title_ids = list(Title.objects.values_list('id', flat=True))
+    urls = []
+    for number in range(count):
+        title_id = rng.choice(title_ids)
+        path, query = rng.choice((
+            ('/api/v1/titles/', 'limit=10'),
+            (f'/api/v1/titles/{title_id}/', ''),
+            (f'/api/v1/titles/{title_id}/reviews/', ''),
+        ))
+        if rng.random() < unique:
+            # Уникальный параметр: ответа нет в кэше.
+            query = f'{query}&n={number}'.lstrip('&')
+        urls.append((path, query))
+    return urls
+
+
+def wsgi_call(application, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80',
+        'HTTP_HOST': 'testserver', 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    }
+    started = time.perf_counter()
+    body = b''.join(application(environ, lambda status, headers: None))
+    assert body
+    return time.perf_counter() - started
+
+
+async def asgi_call(application, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    assert status
+    return time.perf_counter() - started
+
+
+def run_wsgi(urls, concurrency):
+    from api_yamdb.wsgi import application
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(
+            lambda url: wsgi_call(application, *url), urls
+        ))
+
+
+def run_asgi(urls, concurrency):
+    from api_yamdb.asgi import application
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(url):
+            async with semaphore:
+                return await asgi_call(application, *url)
+        return await asyncio.gather(*map(limited, urls))
+    return asyncio.run(main())
+
+
+def run_mode(args):
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'bench.sqlite3'))
+        urls = make_urls(args.requests, args.unique)
+        run = run_wsgi if args.mode == 'wsgi' else run_asgi
+        run(urls[:args.concurrency], args.concurrency)
+        started = time.perf_counter()
+        latencies = sorted(run(urls, args.concurrency))
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'mode': args.mode,
+        'rps': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--unique', type=float, default=0.5)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+    if args.mode:
+        run_mode(args)
+        return
+
+    print(f'{"режим":<12} {"запросов/с":>11} {"p50, мс":>9} {"p99, мс":>9}')
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], '--mode', mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f'{result["mode"]:<12} {result["rps"]:>11.0f} '
+              f'{result["p50"]:>9.1f} {result["p99"]:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
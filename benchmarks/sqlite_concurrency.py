@@ -0,0 +1,147 @@
+'''Нагрузочный тест SQLite: параллельные чтения списка отзывов и запись
+комментариев в профилях базы development и production.
+
+Запуск из корня репозитория:
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 4
+
+Каждый профиль запускается в отдельном процессе на своей временной базе,
+в конце печатается таблица с операциями в секунду и числом ошибок
+"database is locked".
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
+PROFILES = ('development', 'production')
+
+
+def setup_django(profile, database):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'api_yamdb.settings'
+    os.environ['DATABASE_PROFILE'] = profile
+    os.environ['DATABASE_NAME'] = database
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+    django.setup()
+
+
+def seed(reviews):
+    from django.core.management import call_command
+
+    from reviews.models import Category, Review, Title, User
+
+    call_command('migrate', verbosity=0)
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Фильм', year=2000, category=category)
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(reviews)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author_id=user_id, text='text', score=5)
+        for user_id in User.objects.values_list('id', flat=True)
+    )
+    return title.id, list(
+        Review.objects.filter(title=title).values_list('id', 'author_id')
+    )
+
+
+class Worker(threading.Thread):
+    def __init__(self, operation, deadline):
+        super().__init__()
+        self.operation = operation
+        self.deadline = deadline
+        self.done = 0
+        self.locked = 0
+
+    def run(self):
+        from django.db import OperationalError, connections
+
+        try:
+            while time.monotonic() < self.deadline:
+                try:
+                    self.operation()
+                    self.done += 1
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    self.locked += 1
+        finally:
+            connections.close_all()
+
+
+def run_profile(args):
+    setup_django(args.profile, args.database)
+    from django.db import transaction
+
+    from reviews.models import Comment, Review
+
+    title_id, reviews = seed(args.reviews)
+
+    def read():
+        list(
+            Review.objects.filter(title_id=title_id)
+            .select_related('author').order_by('-pub_date', 'id')[:10]
+        )
+
+    def write():
+        review_id, author_id = reviews[time.monotonic_ns() % len(reviews)]
+        with transaction.atomic():
+            Comment.objects.create(
+                review_id=review_id, author_id=author_id, text='comment'
+            )
+            Review.objects.filter(id=review_id).update(text='updated')
+
+    deadline = time.monotonic() + args.seconds
+    readers = [Worker(read, deadline) for _ in range(args.readers)]
+    writers = [Worker(write, deadline) for _ in range(args.writers)]
+    for worker in readers + writers:
+        worker.start()
+    for worker in readers + writers:
+        worker.join()
+    print(json.dumps({
+        'profile': args.profile,
+        'reads': sum(worker.done for worker in readers) / args.seconds,
+        'writes': sum(worker.done for worker in writers) / args.seconds,
+        'locked': sum(worker.locked for worker in readers + writers),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--reviews', type=int, default=200)
+    parser.add_argument('--profile', choices=PROFILES)
+    parser.add_argument('--database')
+    args = parser.parse_args()
+    if args.profile:
+        run_profile(args)
+        return
+
+    results = []
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as directory:
+            output = subprocess.run(
+                [sys.executable, __file__, *sys.argv[1:],
+                 '--profile', profile,
+                 '--database', os.path.join(directory, 'bench.sqlite3')],
+                check=True, capture_output=True, text=True,
+            ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    print(f'{"профиль":<12} {"чтений/с":>10} {"записей/с":>10} '
+          f'{"locked":>8}')
+    for result in results:
+        print(f'{result["profile"]:<12} {result["reads"]:>10.0f} '
+              f'{result["writes"]:>10.0f} {result["locked"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
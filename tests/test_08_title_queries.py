@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleQueries:
+
+    def get_queries_count(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ '
+            'со статусом 200.'
+        )
+        return len(context.captured_queries)
+
+    def test_01_title_list_queries_do_not_depend_on_limit(self, admin_client,
+                                                          client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        one_title = self.get_queries_count(client, f'{url}?limit=1')
+        all_titles = self.get_queries_count(
+            client, f'{url}?limit={len(titles)}'
+        )
+        assert one_title == all_titles, (
+            f'Проверьте, что количество запросов к базе при GET-запросе к '
+            f'`{url}` не зависит от числа произведений на странице: '
+            'жанры должны загружаться одним запросом для всей страницы.'
+        )
+        assert all_titles <= 3, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет не больше трех '
+            'запросов к базе: подсчет, страница произведений и их жанры.'
+        )
+
+    def test_02_title_detail_queries(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert self.get_queries_count(client, url) <= 2, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет не больше двух '
+            'запросов к базе: произведение с категорией и его жанры.'
+        )
@@ -0,0 +1,87 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_titles
+
+
+def walk(client, url, direction='next'):
+    """Проходит все страницы по ссылкам курсорной пагинации."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с курсором возвращает '
+            'ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме пагинации ответ не содержит '
+            'ключ `count`.'
+        )
+        pages.append(data)
+        url = data[direction]
+    return pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def test_01_titles_cursor(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/?pagination=cursor&limit=1'
+        pages = walk(client, url)
+        names = [page['results'][0]['name'] for page in pages]
+        assert names == sorted(title['name'] for title in titles), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'отдает все произведения по одному разу в порядке `name`.'
+        )
+        back = walk(client, pages[-1]['previous'], direction='previous')
+        assert [page['results'][0]['name'] for page in back] == (
+            names[-2::-1]
+        ), (
+            'Проверьте, что ссылки `previous` курсорной пагинации '
+            'возвращают предыдущие страницы.'
+        )
+
+    def test_02_reviews_cursor_stable_on_insert(self, admin_client, admin,
+                                                user, user_client, moderator,
+                                                moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               '?pagination=cursor&limit=1')
+        first_page = moderator_client.get(url).json()
+        moderator_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'new review', 'score': 3}
+        )
+        rest = walk(moderator_client, first_page['next'])
+        seen = [first_page['results'][0]['id']] + [
+            page['results'][0]['id'] for page in rest
+        ]
+        assert sorted(seen) == sorted(review['id'] for review in reviews), (
+            'Проверьте, что курсорная пагинация отзывов не пропускает и не '
+            'повторяет записи, если во время обхода появляются новые отзывы.'
+        )
+
+    def test_03_invalid_cursor(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор приводит к ответу 404.'
+        )
+        for key in ([None, 1], [[1], 1], {'a': 1}, 'ab'):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'k': key, 'r': False}).encode()
+            ).decode()
+            response = client.get(f'/api/v1/titles/?cursor={cursor}')
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что курсор с ключом {key!r} приводит к '
+                'ответу 404.'
+            )
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10UserPagination:
+    url = '/api/v1/users/'
+
+    def create_users(self, django_user_model, count):
+        django_user_model.objects.bulk_create(
+            django_user_model(
+                username=f'user{idx:02}', email=f'user{idx}@yamdb.fake'
+            )
+            for idx in range(count)
+        )
+        return list(
+            django_user_model.objects.values_list('username', flat=True)
+        )
+
+    def test_01_users_page_size(self, admin_client, django_user_model):
+        usernames = self.create_users(django_user_model, 5)
+        response = admin_client.get(f'{self.url}?page_size=4')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['count'] == len(usernames)
+        assert len(data['results']) == 4, (
+            f'Проверьте, что размер страницы `{self.url}` задается '
+            'параметром `page_size`.'
+        )
+
+    def test_02_users_without_count(self, admin_client, django_user_model):
+        self.create_users(django_user_model, 5)
+        response = admin_client.get(f'{self.url}?count=false&page_size=4')
+        data = response.json()
+        assert 'count' not in data, (
+            f'Проверьте, что GET-запрос к `{self.url}?count=false` не '
+            'возвращает ключ `count`.'
+        )
+        assert len(data['results']) == 4 and data['next']
+        data = admin_client.get(data['next']).json()
+        assert len(data['results']) == 2 and data['next'] is None
+
+    def test_03_users_cursor(self, admin_client, django_user_model):
+        usernames = self.create_users(django_user_model, 5)
+        url = f'{self.url}?pagination=cursor&page_size=2'
+        walked = []
+        while url:
+            data = admin_client.get(url).json()
+            walked.extend(user['username'] for user in data['results'])
+            url = data['next']
+        assert walked == sorted(usernames), (
+            f'Проверьте, что курсорная пагинация `{self.url}` отдает всех '
+            'пользователей по одному разу в порядке `username`.'
+        )
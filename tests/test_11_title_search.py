@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+    url = '/api/v1/titles/'
+
+    def search(self, client, text, param='q'):
+        response = client.get(self.url, {param: text})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}?{param}=...` '
+            'возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_name_and_description(self, admin_client, client):
+        create_titles(admin_client)
+        assert self.search(client, 'терминатор') == ['Терминатор'], (
+            'Проверьте, что поиск по `q` находит произведение по названию '
+            'без учета регистра.'
+        )
+        assert self.search(client, 'Yippie', 'search') == ['Крепкий орешек'], (
+            'Проверьте, что поиск по `search` находит произведение '
+            'по описанию.'
+        )
+        assert self.search(client, 'креп ореш') == ['Крепкий орешек'], (
+            'Проверьте, что поиск находит произведение по началу слов.'
+        )
+        assert self.search(client, 'терминатор орешек') == []
+
+    def test_02_search_index_follows_writes(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'{self.url}{titles[0]["id"]}/', data={'name': 'Хищник'}
+        )
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'хищник') == ['Хищник'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        admin_client.delete(f'{self.url}{titles[0]["id"]}/')
+        assert self.search(client, 'хищник') == [], (
+            'Проверьте, что удаленное произведение не находится поиском.'
+        )
+
+    def test_03_search_ranking(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'{self.url}{titles[1]["id"]}/',
+            data={'description': 'Не путать с фильмом Терминатор.'}
+        )
+        assert self.search(client, 'терминатор') == [
+            'Терминатор', 'Крепкий орешек'
+        ], (
+            'Проверьте, что совпадения в названии ранжируются выше '
+            'совпадений в описании.'
+        )
+
+    def test_04_search_rejects_cursor(self, admin_client, client):
+        create_titles(admin_client)
+        for params in ({'q': 'терминатор', 'pagination': 'cursor'},
+                       {'search': 'терминатор', 'cursor': 'abc'}):
+            response = client.get(self.url, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что поиск вместе с курсорной пагинацией '
+                'возвращает ответ со статусом 400.'
+            )
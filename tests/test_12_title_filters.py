@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleFilters:
+    url = '/api/v1/titles/'
+
+    def get_names(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}?{query}` возвращает '
+            'ответ со статусом 200.'
+        )
+        data = response.json()
+        names = [title['name'] for title in data['results']]
+        assert data['count'] == len(names)
+        return sorted(names)
+
+    def test_01_exact_slug_filters(self, admin_client, client):
+        create_titles(admin_client)
+        assert self.get_names(client, 'category=film') == [], (
+            'Проверьте, что фильтр `category` сравнивает slug точно.'
+        )
+        assert self.get_names(client, 'genre=horr') == []
+        assert self.get_names(client, 'category=films,books') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+
+    def test_02_multiple_genres(self, admin_client, client):
+        create_titles(admin_client)
+        assert self.get_names(client, 'genre=horror,comedy') == [
+            'Терминатор'
+        ], (
+            'Проверьте, что произведение с несколькими подходящими жанрами '
+            'возвращается один раз.'
+        )
+        assert self.get_names(client, 'genre=horror,drama') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        assert self.get_names(
+            client, 'genre=horror,comedy&genre_match=all'
+        ) == ['Терминатор']
+        assert self.get_names(
+            client, 'genre=horror,drama&genre_match=all'
+        ) == [], (
+            'Проверьте, что при `genre_match=all` возвращаются только '
+            'произведения со всеми перечисленными жанрами.'
+        )
+
+    def test_03_substring_filters(self, admin_client, client):
+        create_titles(admin_client)
+        assert self.get_names(client, 'category_contains=film') == [
+            'Терминатор'
+        ]
+        assert self.get_names(client, 'genre_contains=r') == [
+            'Крепкий орешек', 'Терминатор'
+        ], (
+            'Проверьте, что фильтр `genre_contains` ищет по части slug '
+            'и не возвращает дубликаты.'
+        )
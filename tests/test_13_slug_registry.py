@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13SlugRegistry:
+
+    def test_01_title_create_does_not_query_slugs(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        admin_client.get('/api/v1/genres/')
+        admin_client.get('/api/v1/categories/')
+        data = {
+            'name': 'Терминатор',
+            'year': 1984,
+            'genre': [genres[0]['slug'], genres[1]['slug']],
+            'category': categories[0]['slug'],
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        slug_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"slug" IN' in query['sql'] or '"slug" =' in query['sql']
+        ]
+        assert not slug_queries, (
+            'Проверьте, что при создании произведения slug категории и '
+            'жанров берутся из справочника, а не запросом к базе.'
+        )
+        assert response.json()['category'] == categories[0]
+
+    def test_02_registry_invalidated_on_change(self, admin_client, client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+        assert client.get(url).json()['count'] == 3
+        admin_client.delete(f'{url}horror/')
+        data = client.get(url).json()
+        assert data['count'] == 2, (
+            f'Проверьте, что после удаления жанра `{url}` его не содержит.'
+        )
+        admin_client.post(url, data={'name': 'Вестерн', 'slug': 'western'})
+        names = [genre['name'] for genre in client.get(url).json()['results']]
+        assert names == ['Вестерн', 'Драма', 'Комедия'], (
+            f'Проверьте, что новый жанр появляется в `{url}` и список '
+            'отсортирован по названию.'
+        )
+
+    def test_03_registry_search(self, admin_client, client):
+        create_genre(admin_client)
+        response = client.get('/api/v1/genres/?search=дра')
+        assert [genre['slug'] for genre in response.json()['results']] == [
+            'drama'
+        ]
+
+    def test_04_stale_registry(self, admin_client, client, settings):
+        # bulk_create не вызывает сигналов: так выглядит категория,
+        # добавленная другим процессом с отдельным кэшем.
+        create_genre(admin_client)
+        create_categories(admin_client)
+        client.get('/api/v1/genres/')
+        Category.objects.bulk_create([Category(name='Новая', slug='new')])
+        Genre.objects.bulk_create([Genre(name='Вестерн', slug='western')])
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Терминатор',
+            'year': 1984,
+            'genre': ['western'],
+            'category': 'new',
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что slug, которого нет в справочнике, перед '
+            'отказом ищется в базе.'
+        )
+        assert admin_client.post('/api/v1/titles/', data={
+            'name': 'Терминатор', 'year': 1984,
+            'genre': ['western'], 'category': 'unknown',
+        }).status_code == HTTPStatus.BAD_REQUEST
+
+        Genre.objects.bulk_create([Genre(name='Аниме', slug='anime')])
+        settings.SLUG_REGISTRY_TTL = 0
+        slugs = [
+            genre['slug']
+            for genre in admin_client.get(
+                '/api/v1/genres/'
+            ).json()['results']
+        ]
+        assert 'anime' in slugs, (
+            'Проверьте, что справочник перечитывается по истечении '
+            'SLUG_REGISTRY_TTL.'
+        )
+
+    def test_05_deleted_slug_in_registry(self, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        admin_client.get('/api/v1/categories/')
+        # Удаление без сигналов: так категорию удаляет другой процесс.
+        Category.objects.filter(slug='films')._raw_delete('default')
+        data = {
+            'name': 'Терминатор', 'year': 1984,
+            'genre': ['drama'], 'category': 'films',
+        }
+        for _ in range(2):
+            response = admin_client.post('/api/v1/titles/', data=data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что slug удаленной категории из устаревшего '
+                'справочника приводит к ответу 400.'
+            )
+            assert 'category' in response.json()
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_comments, create_single_review,
+                         create_titles, get_token_client)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    @pytest.fixture(autouse=True)
+    def response_cache(self, settings):
+        settings.API_RESPONSE_CACHE = True
+
+    def test_01_anonymous_titles_cached(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный анонимный GET-запрос к `{url}` '
+            'отдается из кэша.'
+        )
+        assert response.json()['rating'] is None
+
+        create_single_review(admin_client, titles[0]['id'], 'text', 7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что кэш произведений сбрасывается при появлении '
+            'нового отзыва.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_02_query_params_normalized(self, admin_client, client):
+        create_titles(admin_client)
+        client.get('/api/v1/titles/?year=1984&limit=5')
+        response = client.get('/api/v1/titles/?limit=5&year=1984')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок параметров запроса не влияет на ключ '
+            'кэша.'
+        )
+
+    def test_03_reviews_cache_and_stats(self, admin_client, client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        create_single_review(user_client, titles[0]['id'], 'text', 5)
+        response = client.get(url)
+        assert response.json()['count'] == 1, (
+            f'Проверьте, что кэш `{url}` сбрасывается при новом отзыве.'
+        )
+        assert 'X-Cache' not in admin_client.get(url), (
+            'Проверьте, что ответы авторизованным пользователям '
+            'не кэшируются.'
+        )
+
+        response = admin_client.get('/api/v1/stats/')
+        assert response.status_code == HTTPStatus.OK
+        stats = response.json()['response_cache']
+        assert stats['hits'] >= 1 and stats['misses'] >= 2
+        assert client.get('/api/v1/stats/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_04_author_rename(self, admin_client, admin, user, client):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        client.get(reviews_url)
+        assert client.get(reviews_url)['X-Cache'] == 'HIT'
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url in (reviews_url, comments_url):
+            authors = {
+                obj['author'] for obj in client.get(url).json()['results']
+            }
+            assert 'renamed' in authors and user.username not in authors, (
+                f'Проверьте, что кэш `{url}` сбрасывается при смене имени '
+                'автора.'
+            )
+
+    def test_05_local_cache(self, admin_client, client, settings):
+        create_titles(admin_client)
+        settings.API_RESPONSE_CACHE = None
+        client.get('/api/v1/titles/')
+        assert 'X-Cache' not in client.get('/api/v1/titles/'), (
+            'Проверьте, что при кэше в памяти процесса кэш ответов '
+            'выключен: другие процессы не видят сброса версий.'
+        )
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+
+from api import cache
+
+from tests.utils import (create_comments, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    @pytest.fixture(autouse=True)
+    def conditional_get(self, settings):
+        settings.API_CONDITIONAL_GET = True
+
+    def assert_not_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+    def test_01_titles_etag(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что `Last-Modified` с точностью до секунды не '
+            'отдается: по нему можно получить 304 на измененные данные.'
+        )
+        self.assert_not_modified(client, url, etag)
+        self.assert_not_modified(admin_client, url, etag)
+
+        create_single_review(admin_client, titles[0]['id'], 'text', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после нового отзыва `{url}` отдается заново.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_etag_depends_on_query(self, admin_client, client):
+        create_titles(admin_client)
+        etag = client.get('/api/v1/titles/?year=1984')['ETag']
+        response = client.get(
+            '/api/v1/titles/?year=1988', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_comments_etag(self, admin_client, admin, user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        etag = user_client.get(url)['ETag']
+        self.assert_not_modified(user_client, url, etag)
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'new'
+        )
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после нового комментария `{url}` отдается '
+            'заново.'
+        )
+        assert response.json()['count'] == len(comments) + 1
+
+    def test_04_local_cache(self, admin_client, client, settings,
+                            tmp_path):
+        create_titles(admin_client)
+        settings.API_CONDITIONAL_GET = None
+        assert 'ETag' not in client.get('/api/v1/titles/'), (
+            'Проверьте, что при кэше в памяти процесса условные GET-запросы '
+            'выключены: версии в разных процессах не совпадают.'
+        )
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        assert cache.conditional_get_enabled()
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import get_token_client as get_client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16StatelessJWT:
+
+    def test_01_permissions_without_user_query(self, admin):
+        client = get_client(admin)
+        client.get('/api/v1/categories/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'film'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_queries(context), (
+            'Проверьте, что права администратора проверяются по данным '
+            'токена, без запроса пользователя из базы.'
+        )
+
+    def test_02_me_loads_full_user(self, user):
+        client = get_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+    def test_03_role_change_revokes_token(self, user, admin_client):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что смена роли отзывает выданные токены.'
+        assert get_client(user).get('/api/v1/users/me/').json()['role'] == (
+            'moderator'
+        )
+
+    def test_04_delete_revokes_token(self, user, admin_client):
+        client = get_client(user)
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что удаление пользователя отзывает его токены.'
+
+    def test_05_profile_change_keeps_token(self, user):
+        client = get_client(user)
+        response = client.patch('/api/v1/users/me/', data={'bio': 'new bio'})
+        assert response.status_code == HTTPStatus.OK
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_reviews, get_token_client
+
+
+def run_counted(request):
+    with CaptureQueriesContext(connection) as context:
+        response = request()
+    selects = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+    ]
+    return response, selects
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ReviewWriteQueries:
+
+    def test_01_review_patch_and_delete(self, admin_client, admin, user):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        client = get_token_client(user)
+        review = next(item for item in reviews if item['author'] == 'TestUser')
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+
+        response, selects = run_counted(
+            lambda: client.patch(url, data={'text': 'new text'})
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(selects) == 1, (
+            f'Проверьте, что PATCH-запрос автора к `{url}` выбирает отзыв '
+            'и его автора одним запросом и проверяет права по author_id.'
+        )
+
+        response, selects = run_counted(lambda: client.delete(url))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        # Отзыв и затем его комментарии для каскадного удаления.
+        assert len(selects) == 2, (
+            f'Проверьте, что DELETE-запрос автора к `{url}` не загружает '
+            'автора отдельным запросом.'
+        )
+
+    def test_02_comment_patch_and_delete(self, admin_client, admin, user):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        client = get_token_client(user)
+        comment = next(
+            item for item in comments if item['author'] == 'TestUser'
+        )
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/{comment["id"]}/')
+
+        response, selects = run_counted(
+            lambda: client.patch(url, data={'text': 'new text'})
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(selects) == 1, (
+            f'Проверьте, что PATCH-запрос автора к `{url}` выбирает '
+            'комментарий одним запросом.'
+        )
+        response, selects = run_counted(lambda: client.delete(url))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert len(selects) == 1
+
+    def test_03_foreign_review_forbidden(self, admin_client, admin, user):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        review = next(item for item in reviews if item['author'] != 'TestUser')
+        response = get_token_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/',
+            data={'text': 'new text'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_review_create_single_query(self, admin_client, admin, user):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        client = get_token_client(user)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'text', 'score': 5}
+        response, selects = run_counted(lambda: client.post(url, data=data))
+        assert response.status_code == HTTPStatus.CREATED
+        assert not selects, (
+            f'Проверьте, что POST-запрос к `{url}` создает отзыв без '
+            'предварительных SELECT-запросов.'
+        )
+        response = client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что повторный отзыв к `{url}` возвращает 400.'
+        )
+        response = client.post('/api/v1/titles/100500/reviews/', data=data)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв к несуществующему произведению '
+            'возвращает 404.'
+        )
@@ -0,0 +1,166 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.importer import TABLES, CsvImporter, get_levels
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, User)
+
+CSV_FILES = {
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,reader,reader@yamdb.fake,user,,,\n'
+        '101,critic,critic@yamdb.fake,user,,,\n'
+    ),
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n',
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Первое,1990,1\n'
+        '2,Второе,2000,1\n'
+        '3,Без категории,2000,99\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,3,1\n',
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,хорошо,100,8,2019-09-24T21:08:21.567Z\n'
+        '2,1,"много\nстрок",101,4,2019-09-25T21:08:21.567Z\n'
+        '3,2,неизвестный автор,999,1,2019-09-25T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,согласен,101,2019-09-26T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18CsvImport:
+
+    def test_01_chunked_import(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+
+        call_command(
+            'load_cvs_file', path=tmp_path, chunk_size=1, stdout=None
+        )
+
+        assert User.objects.count() == 2
+        assert Category.objects.count() == 1
+        assert sorted(Title.objects.values_list('id', flat=True)) == [1, 2], (
+            'Проверьте, что строки со ссылкой на несуществующую запись '
+            'пропускаются при загрузке.'
+        )
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 1
+        assert Review.objects.get(id=2).text == 'много\nстрок'
+        assert Review.objects.get(id=1).pub_date.year == 2019, (
+            'Проверьте, что при загрузке сохраняется дата из файла.'
+        )
+        title = Title.objects.get(id=1)
+        assert title.rating == 6, (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг.'
+        )
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
+
+    def test_02_upsert(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        call_command('load_cvs_file', path=tmp_path, upsert=True)
+        call_command('load_cvs_file', path=tmp_path, upsert=True)
+        assert Title.objects.count() == 2, (
+            'Проверьте, что повторная загрузка с --upsert не создает '
+            'дубликатов и не падает.'
+        )
+        reader = User.objects.get(username='reader')
+        critic = User.objects.get(username='critic')
+
+        (tmp_path / 'review.csv').write_text(
+            CSV_FILES['review.csv'].replace(',8,', ',2,'), encoding='utf-8'
+        )
+        (tmp_path / 'users.csv').write_text(
+            CSV_FILES['users.csv'].replace(
+                'reader@yamdb.fake,user', 'reader@yamdb.fake,moderator'
+            ), encoding='utf-8'
+        )
+        (tmp_path / 'category.csv').write_text(
+            'name,slug\nКино,movie\nМузыка,music\n', encoding='utf-8'
+        )
+        call_command('load_cvs_file', path=tmp_path, upsert=True)
+
+        assert Review.objects.count() == 2
+        assert Title.objects.get(id=1).rating == 3, (
+            'Проверьте, что измененные отзывы обновляются и рейтинг '
+            'пересчитывается.'
+        )
+        assert list(
+            Category.objects.order_by('slug').values_list('name', 'slug')
+        ) == [('Кино', 'movie'), ('Музыка', 'music')], (
+            'Проверьте, что файл без колонки id сопоставляется по slug.'
+        )
+        updated = User.objects.get(username='reader')
+        assert updated.role == 'moderator'
+        assert updated.token_version == reader.token_version + 1, (
+            'Проверьте, что смена роли при загрузке отзывает токены.'
+        )
+        assert User.objects.get(
+            username='critic'
+        ).token_version == critic.token_version
+
+    def test_02b_upsert_skips_deleted(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        call_command('load_cvs_file', path=tmp_path, upsert=True)
+        User.objects.get(id=100).mark_deleted()
+        Title.objects.get(id=2).mark_deleted()
+
+        (tmp_path / 'titles.csv').write_text(
+            CSV_FILES['titles.csv'].replace('Второе', 'Другое'),
+            encoding='utf-8'
+        )
+        results = {
+            model: (stats, error)
+            for model, _, stats, error in CsvImporter(
+                tmp_path, upsert=True
+            ).load_all({User: 'users.csv', Title: 'titles.csv'})
+        }
+        assert results[User][1] is None, (
+            'Проверьте, что загрузка с --upsert не падает на удаленных '
+            'пользователях.'
+        )
+        assert results[User][0].skipped == 1
+        assert User.all_objects.get(id=100).username == '#deleted-100', (
+            'Проверьте, что загрузка с --upsert не восстанавливает '
+            'удаленных пользователей.'
+        )
+        title = Title.all_objects.get(id=2)
+        assert title.deleted and title.name == 'Второе'
+
+    def test_03_dependency_levels(self):
+        levels = [set(level) for level in get_levels(TABLES)]
+        assert levels == [
+            {User, Category, Genre}, {Title}, {Review, TitleGenre}, {Comment}
+        ], (
+            'Проверьте, что порядок загрузки строится по внешним ключам '
+            'моделей и независимые таблицы попадают в один уровень.'
+        )
+
+    def test_04_parallel_import(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        (tmp_path / 'genre.csv').write_text(
+            'id,name,slug,color\n1,Драма,drama,red\n', encoding='utf-8'
+        )
+
+        call_command(
+            'load_cvs_file', path=tmp_path, chunk_size=1, workers=2
+        )
+
+        assert sorted(Title.objects.values_list('id', flat=True)) == [1, 2]
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 1
+        assert Title.objects.get(id=1).rating == 6
+        assert not Genre.objects.exists()
+        assert not TitleGenre.objects.exists(), (
+            'Проверьте, что ошибка в одном файле не останавливает загрузку '
+            'остальных, а строки со ссылками на него пропускаются.'
+        )
@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Export:
+
+    def test_01_export_permissions(self, client, user_client, admin_client):
+        url = '/api/v1/export/titles/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что выгрузка доступна только администратору.'
+        )
+        assert admin_client.get(
+            '/api/v1/export/unknown/'
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert admin_client.get(
+            url, {'output': 'xml'}
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_export_csv(self, admin_client, admin):
+        create_reviews(admin_client, {admin: admin_client})
+        response = admin_client.get('/api/v1/export/review/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдается потоком.'
+        )
+        assert 'review.csv' in response['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(read_stream(response).decode())))
+        review = Review.objects.get()
+        assert rows == [{
+            'id': str(review.id),
+            'title_id': str(review.title_id),
+            'text': review.text,
+            'author': str(admin.id),
+            'score': str(review.score),
+            'pub_date': review.pub_date.isoformat(),
+        }], (
+            'Проверьте, что колонки выгрузки совпадают с файлами, '
+            'которые читает load_cvs_file.'
+        )
+
+    def test_03_export_ndjson_gzip(self, admin_client):
+        create_reviews(admin_client, {})
+        response = admin_client.get(
+            '/api/v1/export/titles/', {'output': 'ndjson', 'compress': 'gzip'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/gzip'
+        lines = gzip.decompress(read_stream(response)).decode().splitlines()
+        titles = [json.loads(line) for line in lines]
+        assert sorted(title['name'] for title in titles) == sorted(
+            Title.objects.values_list('name', flat=True)
+        )
+
+    def test_04_dump_and_reload(self, admin_client, admin, tmp_path):
+        create_reviews(admin_client, {admin: admin_client})
+        call_command('dump_csv', path=tmp_path)
+        assert (tmp_path / 'titles.csv').exists()
+
+        out = io.StringIO()
+        call_command('load_cvs_file', path=tmp_path, upsert=True, stdout=out)
+        reports = [
+            line for line in out.getvalue().splitlines()
+            if 'без изменений' in line
+        ]
+        assert reports
+        assert all(
+            ': 0 строк' in line and 'обновлено 0,' in line
+            for line in reports
+        ), 'Проверьте, что повторная загрузка выгрузки ничего не меняет.'
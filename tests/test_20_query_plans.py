@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from tests.utils import create_comments
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def get_list_plans(client, url, table):
+    '''Планы запросов списка к table, отсортированных в базе.'''
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    plans = []
+    for sql, params in recorder.queries:
+        if not sql.startswith('SELECT') or 'ORDER BY' not in sql:
+            continue
+        if f'FROM "{table}"' not in sql:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plans.append(' | '.join(row[-1] for row in cursor.fetchall()))
+    assert plans, f'Не найден запрос списка к {table} для `{url}`.'
+    return plans
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20QueryPlans:
+
+    @pytest.mark.parametrize('query', ('', '?pagination=cursor'))
+    def test_01_list_queries_use_indexes(self, query, admin_client, admin,
+                                         moderator_client, moderator):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, moderator: moderator_client
+        })
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        endpoints = (
+            ('/api/v1/titles/', 'reviews_title', 'title_name_id_idx'),
+            (f'/api/v1/titles/{title_id}/reviews/', 'reviews_review',
+             'review_title_pub_date_idx'),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+             'reviews_comment', 'comment_review_pub_date_idx'),
+        )
+        for url, table, index in endpoints:
+            for plan in get_list_plans(admin_client, url + query, table):
+                assert 'TEMP B-TREE' not in plan, (
+                    f'Проверьте, что список `{url}` сортируется по индексу, '
+                    f'без временной сортировки. План: {plan}'
+                )
+                assert index in plan, (
+                    f'Проверьте, что список `{url}` использует индекс '
+                    f'{index}. План: {plan}'
+                )
@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+
+from api_yamdb.db.base import DatabaseWrapper
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21DatabaseProfile:
+
+    def test_01_pragmas_on_connect(self, tmp_path):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': str(tmp_path / 'production.sqlite3'),
+            'OPTIONS': {
+                'timeout': 3,
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {
+                    'journal_mode': 'WAL',
+                    'synchronous': 'NORMAL',
+                    'cache_size': -2048,
+                },
+            },
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='production')
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                assert cursor.fetchone()[0] == 'wal', (
+                    'Проверьте, что PRAGMA из OPTIONS выполняются при '
+                    'открытии соединения.'
+                )
+                cursor.execute('PRAGMA synchronous')
+                assert cursor.fetchone()[0] == 1
+                cursor.execute('PRAGMA cache_size')
+                assert cursor.fetchone()[0] == -2048
+                cursor.execute('PRAGMA busy_timeout')
+                assert cursor.fetchone()[0] == 3000
+
+            executed = []
+            wrapper.execute_wrappers.append(
+                lambda execute, sql, *args: (
+                    executed.append(sql) or execute(sql, *args)
+                )
+            )
+            wrapper.set_autocommit(
+                False, force_begin_transaction_with_broken_autocommit=True
+            )
+            wrapper.rollback()
+            wrapper.set_autocommit(True)
+            assert 'BEGIN IMMEDIATE' in executed
+        finally:
+            wrapper.close()
@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from api.authentication import REVOKED, get_token_version
+from api.mixins import CachedListMixin
+from api_yamdb.db.replicas import (ReplicaMiddleware, ReplicaRouter,
+                                   request_state)
+from reviews.models import Review, Title
+
+router = ReplicaRouter()
+
+
+def make_middleware(status=200, write=False):
+    '''Middleware с ответом, который запоминает выбранные базы.'''
+    used = []
+
+    def get_response(request):
+        used.append(router.db_for_read(Title))
+        if write:
+            used.append(router.db_for_write(Review))
+            used.append(router.db_for_read(Review))
+        return HttpResponse(status=status)
+
+    return ReplicaMiddleware(get_response), used
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ReplicaRouter:
+    factory = RequestFactory()
+
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_READ_REPLICAS = ['replica1']
+        settings.DATABASE_REPLICA_STICKINESS = 5
+        return settings
+
+    def test_01_reads_and_writes(self):
+        middleware, used = make_middleware()
+        middleware(self.factory.get('/api/v1/titles/'))
+        assert used == ['replica1'], (
+            'Проверьте, что чтения GET-запроса идут в реплику.'
+        )
+
+        middleware, used = make_middleware()
+        middleware(self.factory.post('/api/v1/titles/'))
+        assert used == ['default'], (
+            'Проверьте, что небезопасные запросы читают из default.'
+        )
+
+        middleware, used = make_middleware(write=True)
+        middleware(self.factory.get('/api/v1/titles/'))
+        assert used == ['replica1', 'default', 'default'], (
+            'Проверьте, что после записи чтения в том же запросе '
+            'идут в default.'
+        )
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне запросов используется default.'
+        )
+
+    def test_02_sticky_after_write(self, replicas):
+        auth = {'HTTP_AUTHORIZATION': 'Bearer author'}
+        other = {'HTTP_AUTHORIZATION': 'Bearer reader'}
+
+        middleware, used = make_middleware(status=400)
+        middleware(self.factory.post('/api/v1/titles/1/reviews/', **auth))
+        middleware(self.factory.get('/api/v1/titles/1/reviews/', **auth))
+        assert used[-1] == 'replica1', (
+            'Проверьте, что неуспешная запись не привязывает к default.'
+        )
+
+        middleware, used = make_middleware(status=201)
+        middleware(self.factory.post('/api/v1/titles/1/reviews/', **auth))
+        middleware(self.factory.get('/api/v1/titles/1/reviews/', **auth))
+        middleware(self.factory.get('/api/v1/titles/1/reviews/', **other))
+        middleware(self.factory.get('/api/v1/titles/1/reviews/'))
+        assert used == ['default', 'default', 'replica1', 'replica1'], (
+            'Проверьте, что после записи автор читает из default, '
+            'а остальные клиенты - из реплики.'
+        )
+
+        replicas.DATABASE_REPLICA_STICKINESS = 0
+        middleware, used = make_middleware(status=201)
+        middleware(self.factory.post('/', **other))
+        middleware(self.factory.get('/', **other))
+        assert used[-1] == 'replica1'
+
+    def test_03_cache_fill_and_tokens_read_primary(self, user, replicas):
+        replicas.API_RESPONSE_CACHE = True
+        view = CachedListMixin()
+        view.cache_namespaces = ('titles',)
+        used = []
+
+        def handler(request):
+            used.append(router.db_for_read(Title))
+            return Response([])
+
+        token = request_state.set({'primary': False})
+        try:
+            request = Request(self.factory.get('/api/v1/titles/'))
+            view.cached_response(handler, request)
+            assert used == ['default'], (
+                'Проверьте, что ответ, который попадет в кэш, строится по '
+                'default, а не по отстающей реплике.'
+            )
+            request_state.set({'primary': False})
+            cache.clear()
+            assert get_token_version(user.pk) not in (None, REVOKED), (
+                'Проверьте, что версия токенов читается из default.'
+            )
+        finally:
+            request_state.reset(token)
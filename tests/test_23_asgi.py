@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import asgi_get, asgi_request, create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Asgi:
+
+    @pytest.fixture(autouse=True)
+    def shared_cache(self, settings):
+        settings.API_RESPONSE_CACHE = True
+        settings.API_CONDITIONAL_GET = True
+
+    def test_01_cached_reads(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/',
+                    f'/api/v1/titles/{titles[0]["id"]}/reviews/'):
+            first = asgi_get(url)
+            assert first.status_code == HTTPStatus.OK
+            assert first['X-Cache'] == 'MISS'
+            second = asgi_get(url)
+            assert second['X-Cache'] == 'HIT'
+            assert second.json() == first.json(), (
+                f'Проверьте, что ответ `{url}` из кэша совпадает с ответом '
+                'вьюхи.'
+            )
+            assert second['ETag'] == first['ETag']
+            assert second['Content-Type'] == 'application/json'
+            not_modified = asgi_get(
+                url, **{'if-none-match': first['ETag']}
+            )
+            assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+        html = asgi_get('/api/v1/titles/', accept='text/html')
+        assert html['Content-Type'].startswith('text/html')
+
+    def test_02_writes_and_auth(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = '/api/v1/titles/'
+        asgi_get(url)
+        response = admin_client.patch(
+            f'{url}{titles[0]["id"]}/', data={'name': 'Новое название'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = asgi_get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение произведения сбрасывает кэш '
+            'и под ASGI.'
+        )
+        assert 'Новое название' in response.content.decode()
+
+        response = asgi_request(
+            'post', '/api/v1/auth/signup/',
+            data={'username': 'async_user', 'email': 'async@yamdb.fake'},
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK, response.content
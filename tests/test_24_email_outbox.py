@@ -0,0 +1,122 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews import outbox
+from reviews.models import EmailOutbox
+
+Statuses = EmailOutbox.Statuses
+
+
+class FlakyBackend(EmailBackend):
+    '''Не отправляет письма на адреса из failing.'''
+    failing = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.failing:
+                raise ConnectionError('Почтовый сервер недоступен')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24EmailOutbox:
+
+    def test_01_signup_enqueues(self, client):
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'queued@yamdb.fake', 'username': 'queued'
+        })
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо во время '
+            'запроса.'
+        )
+        item = EmailOutbox.objects.get()
+        assert item.to == 'queued@yamdb.fake'
+        assert item.status == Statuses.PENDING
+
+        call_command('send_outbox', '--once')
+        assert [message.to for message in mail.outbox] == [
+            ['queued@yamdb.fake']
+        ], 'Проверьте, что send_outbox отправляет письма из очереди.'
+        item.refresh_from_db()
+        assert item.status == Statuses.SENT
+        assert item.sent_at is not None
+
+    def test_02_batch_uses_one_connection(self, settings):
+        outbox.enqueue(
+            'Тема', 'Текст', 'from@yamdb.fake',
+            [f'user{number}@yamdb.fake' for number in range(5)]
+        )
+        with mock.patch(
+            'reviews.outbox.get_connection', wraps=outbox.get_connection
+        ) as get_connection:
+            assert outbox.deliver(batch_size=3) == (3, 0)
+            assert outbox.deliver(batch_size=3) == (2, 0)
+            assert outbox.deliver(batch_size=3) == (0, 0)
+        assert get_connection.call_count == 2, (
+            'Проверьте, что письма пачки отправляются через одно '
+            'соединение.'
+        )
+        assert len(mail.outbox) == 5
+
+    def test_03_retries(self, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 10
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        FlakyBackend.failing = {'broken@yamdb.fake'}
+        outbox.enqueue(
+            'Тема', 'Текст', 'from@yamdb.fake',
+            ['ok@yamdb.fake', 'broken@yamdb.fake']
+        )
+        assert outbox.deliver() == (1, 1), (
+            'Проверьте, что ошибка одного письма не мешает отправке '
+            'остальных.'
+        )
+        broken = EmailOutbox.objects.get(to='broken@yamdb.fake')
+        assert broken.status == Statuses.PENDING
+        assert broken.attempts == 1
+        assert 'недоступен' in broken.last_error
+        delay = broken.send_after - timezone.now()
+        assert timedelta(seconds=5) < delay <= timedelta(seconds=10), (
+            'Проверьте, что повтор откладывается на '
+            'EMAIL_OUTBOX_RETRY_DELAY секунд.'
+        )
+        assert outbox.deliver() == (0, 0)
+
+        EmailOutbox.objects.filter(pk=broken.pk).update(
+            send_after=timezone.now()
+        )
+        assert outbox.deliver() == (0, 1)
+        broken.refresh_from_db()
+        assert broken.status == Statuses.FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+        assert outbox.retry_delay(3) == timedelta(seconds=40)
+
+    def test_04_claim_is_exclusive(self, settings):
+        outbox.enqueue(
+            'Тема', 'Текст', 'from@yamdb.fake',
+            [f'user{number}@yamdb.fake' for number in range(4)]
+        )
+        first = outbox.claim(3)
+        second = outbox.claim(3)
+        assert len(first) == 3 and len(second) == 1
+        assert not {item.id for item in first} & {
+            item.id for item in second
+        }, 'Проверьте, что одно письмо не забирают два обработчика.'
+        assert outbox.claim(3) == []
+
+        EmailOutbox.objects.filter(pk=first[0].pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        assert [item.pk for item in outbox.claim(3)] == [first[0].pk], (
+            'Проверьте, что письмо упавшего обработчика возвращается в '
+            'очередь после окончания срока.'
+        )
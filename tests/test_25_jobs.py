@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews import jobs
+from reviews.models import Job, Title
+from tests.utils import create_reviews
+
+Statuses = Job.Statuses
+calls = []
+
+
+@jobs.job('test_append')
+def append(value):
+    calls.append(value)
+
+
+@jobs.job('test_flaky', max_attempts=2)
+def flaky(value):
+    Title.objects.filter(pk=value).update(name='Не сохранится')
+    raise RuntimeError('Задача упала')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Jobs:
+
+    @pytest.fixture(autouse=True)
+    def clean_calls(self, settings):
+        settings.JOBS_RETRY_DELAY = 10
+        calls.clear()
+        return settings
+
+    def test_01_enqueue_and_run(self):
+        append.delay(value=1)
+        append.delay(value=2)
+        later = append.delay(
+            value=3, _run_after=timezone.now() + timedelta(hours=1)
+        )
+        assert calls == []
+
+        call_command('run_worker', '--once')
+        assert calls == [1, 2], (
+            'Проверьте, что run_worker выполняет задачи, которые пора '
+            'выполнить, по порядку постановки.'
+        )
+        later.refresh_from_db()
+        assert later.status == Statuses.PENDING
+        done = Job.objects.filter(status=Statuses.DONE)
+        assert done.count() == 2
+        assert all(job.finished and job.duration is not None
+                   for job in done)
+
+        first = append.delay(_unique=True, value=4)
+        assert append.delay(_unique=True, value=4) == first, (
+            'Проверьте, что unique не создает дубль задачи в очереди.'
+        )
+        assert append.delay(_unique=True, value=5) != first
+
+    def test_02_retries(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        title_id = titles[0]['id']
+        job = flaky.delay(value=title_id)
+
+        assert jobs.work() == (0, 1)
+        job.refresh_from_db()
+        assert job.status == Statuses.PENDING
+        assert job.attempts == 1
+        assert 'Задача упала' in job.last_error
+        assert job.run_after > timezone.now() + timedelta(seconds=5), (
+            'Проверьте, что повтор задачи откладывается.'
+        )
+        assert Title.objects.get(pk=title_id).name != 'Не сохранится', (
+            'Проверьте, что изменения упавшей задачи откатываются.'
+        )
+        assert jobs.work() == (0, 0)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        assert jobs.work() == (0, 1)
+        job.refresh_from_db()
+        assert job.status == Statuses.FAILED, (
+            'Проверьте, что после max_attempts попыток задача больше не '
+            'выполняется.'
+        )
+
+        unknown = jobs.enqueue('no_such_job')
+        assert jobs.work() == (0, 1)
+        unknown.refresh_from_db()
+        assert unknown.status == Statuses.FAILED
+
+    def test_03_claim_is_exclusive(self):
+        for value in range(4):
+            append.delay(value=value)
+        first = jobs.claim(3)
+        second = jobs.claim(3)
+        assert len(first) == 3 and len(second) == 1
+        assert not {job.id for job in first} & {job.id for job in second}, (
+            'Проверьте, что одну задачу не забирают два обработчика.'
+        )
+        assert jobs.claim(3, names=['test_append']) == []
+
+        Job.objects.filter(pk=first[0].pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        assert [job.pk for job in jobs.claim(3)] == [first[0].pk], (
+            'Проверьте, что задача упавшего обработчика возвращается в '
+            'очередь после окончания срока.'
+        )
+
+    def test_04_stats_and_builtin_jobs(self, admin_client, client):
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'worker@yamdb.fake', 'username': 'worker'
+        })
+        assert response.status_code == 200
+        append.delay(value=1)
+        append.delay(value=2)
+        call_command('rebuild_ratings', '--background')
+
+        call_command('run_worker', '--once')
+        assert [message.to for message in mail.outbox] == [
+            ['worker@yamdb.fake']
+        ], 'Проверьте, что run_worker отправляет письма регистрации.'
+
+        stats = admin_client.get('/api/v1/stats/').json()['jobs']
+        assert stats['test_append']['done'] == 2, (
+            'Проверьте, что /api/v1/stats/ показывает выполненные задачи '
+            'по типам.'
+        )
+        assert stats['test_append']['pending'] == 0
+        assert stats['test_append']['per_second'] > 0
+        assert stats['send_outbox']['done'] == 1
+        assert stats['rebuild_ratings']['done'] == 1
+
+        assert jobs.purge_finished(keep=60) == 0
+        Job.objects.update(finished=timezone.now() - timedelta(seconds=5))
+        assert jobs.purge_finished(keep=1) == 4
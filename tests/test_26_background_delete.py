@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.counters import find_drift
+from reviews.deletion import delete_in_batches
+from reviews.exporter import export_rows
+from reviews.models import Comment, Review, Title, User
+from tests.utils import create_comments, get_token_client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26BackgroundDelete:
+
+    def test_01_title_hidden_then_purged(self, admin_client, admin, user):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/'
+        review_url = f'{url}reviews/{reviews[0]["id"]}/'
+        assert admin_client.get(f'{review_url}comments/').status_code == (
+            HTTPStatus.OK
+        )
+        titles_count = Title.objects.count()
+
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert Title.objects.count() == titles_count - 1
+        for hidden in (url, f'{url}reviews/', review_url,
+                       f'{review_url}comments/',
+                       f'{review_url}comments/{comments[0]["id"]}/'):
+            assert admin_client.get(hidden).status_code == (
+                HTTPStatus.NOT_FOUND
+            ), (
+                f'Проверьте, что после удаления произведения `{hidden}` '
+                'сразу возвращает 404.'
+            )
+        assert Review.objects.filter(title_id=title_id).exists(), (
+            'Проверьте, что отзывы удаляемого произведения удаляются в '
+            'фоне, а не в запросе.'
+        )
+
+        call_command('run_worker', '--once')
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert not Comment.objects.filter(
+            review__title_id=title_id
+        ).exists()
+        assert not Title.all_objects.filter(pk=title_id).exists(), (
+            'Проверьте, что purge_deleted удаляет и само произведение.'
+        )
+
+    def test_02_user_hidden_then_purged(self, admin_client, admin, user):
+        user_client = get_token_client(user)
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert admin_client.get(title_url).json()['rating'] == 5
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).status_code == HTTPStatus.NOT_FOUND
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что токены удаленного пользователя отзываются.'
+        authors = [
+            review['author']
+            for review in admin_client.get(
+                f'{title_url}reviews/'
+            ).json()['results']
+        ]
+        assert authors == [admin.username], (
+            'Проверьте, что отзывы удаленного пользователя сразу '
+            'скрываются.'
+        )
+        response = admin_client.post('/api/v1/users/', data={
+            'username': user.username, 'email': user.email
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что username и email удаленного пользователя '
+            'можно занять сразу.'
+        )
+
+        call_command('run_worker', '--once')
+        assert not Review.objects.filter(author_id=user.pk).exists()
+        assert not Comment.objects.filter(author_id=user.pk).exists()
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert Title.objects.get(pk=titles[0]['id']).rating_count == 1, (
+            'Проверьте, что удаление отзывов в фоне обновляет рейтинг.'
+        )
+
+    def test_03_bounded_batches(self, admin_client, admin, user):
+        create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        with CaptureQueriesContext(connection) as context:
+            assert delete_in_batches(Comment.objects.all(), 1) == 2
+        deletes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('DELETE')
+        ]
+        assert len(deletes) == 2, (
+            'Проверьте, что строки удаляются пачками по batch_size.'
+        )
+
+    def test_04_inline_delete(self, admin_client, admin, settings):
+        settings.DELETE_IN_BACKGROUND = False
+        _, _, titles = create_comments(admin_client, {admin: admin_client})
+        response = admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert not Title.all_objects.filter(pk=titles[0]['id']).exists()
+        assert not Review.objects.filter(title_id=titles[0]['id']).exists()
+
+    def test_05_review_on_hidden_title(self, admin_client, admin):
+        _, _, titles = create_comments(admin_client, {admin: admin_client})
+        title = Title.objects.get(pk=titles[1]['id'])
+        title.mark_deleted()
+        response = admin_client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'отзыв', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв на удаленное произведение нельзя '
+            'создать.'
+        )
+        assert not Review.objects.filter(title_id=title.pk).exists()
+
+    def test_06_counters_while_hidden(self, admin_client, admin, user):
+        user_client = get_token_client(user)
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        user_review = Review.objects.get(author=user)
+        user_client.patch(
+            f'{title_url}reviews/{user_review.pk}/', data={'score': 9}
+        )
+        assert admin_client.get(title_url).json()['rating'] == 7
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        for purged in (False, True):
+            title = admin_client.get(title_url).json()
+            assert (title['review_count'], title['rating']) == (1, 5), (
+                'Проверьте, что отзывы удаленного пользователя сразу '
+                'не учитываются в рейтинге и `review_count`.'
+            )
+            review = admin_client.get(
+                f'{title_url}reviews/{reviews[0]["id"]}/'
+            ).json()
+            assert review['comment_count'] == 1, (
+                'Проверьте, что комментарии удаленного пользователя сразу '
+                'не учитываются в `comment_count`.'
+            )
+            assert find_drift() == {Title: [], Review: []}
+            if not purged:
+                assert {row[0] for row in export_rows(Review)} == {
+                    reviews[0]['id']
+                }, (
+                    'Проверьте, что выгрузка не содержит отзывов удаленных '
+                    'пользователей.'
+                )
+                assert len(list(export_rows(Comment))) == 1
+                call_command('run_worker', '--once')
@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.counters import find_drift
+from reviews.importer import TABLES, CsvImporter
+from reviews.models import Review, Title
+from tests.test_18_csv_import import CSV_FILES
+from tests.utils import create_comments, get_token_client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Counters:
+
+    def test_01_counters_in_responses(self, admin_client, admin, user,
+                                      client):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(title_url).json()['review_count'] == 2, (
+            f'Проверьте, что ответ `{title_url}` содержит `review_count`.'
+        )
+        reviews_url = f'{title_url}reviews/'
+        counts = {
+            review['id']: review['comment_count']
+            for review in client.get(reviews_url).json()['results']
+        }
+        assert counts == {reviews[0]['id']: 2, reviews[1]['id']: 0}, (
+            f'Проверьте, что отзывы в ответе `{reviews_url}` содержат '
+            '`comment_count`.'
+        )
+
+        response = admin_client.delete(
+            f'{reviews_url}{reviews[0]["id"]}/comments/{comments[0]["id"]}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = client.get(f'{reviews_url}{reviews[0]["id"]}/')
+        assert response.json()['comment_count'] == 1, (
+            'Проверьте, что удаление комментария уменьшает `comment_count` '
+            'и сбрасывает кэш отзывов.'
+        )
+        response = admin_client.delete(f'{reviews_url}{reviews[1]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert client.get(title_url).json()['review_count'] == 1
+
+    def test_02_review_delete_skips_counter(self, admin_client, admin,
+                                            user):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+            and 'comment_count' in query['sql']
+        ], (
+            'Проверьте, что при удалении отзыва счетчик его удаляемых '
+            'комментариев не обновляется.'
+        )
+        assert not find_drift()[Title]
+
+    def test_03_check_and_repair(self, admin_client, admin, user):
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: get_token_client(user)
+        })
+        assert find_drift() == {Title: [], Review: []}
+        Title.objects.filter(pk=titles[0]['id']).update(rating_count=7)
+        Review.objects.filter(pk=reviews[0]['id']).update(comment_count=0)
+        assert find_drift() == {
+            Title: [titles[0]['id']], Review: [reviews[0]['id']]
+        }, 'Проверьте, что find_drift находит разошедшиеся счетчики.'
+
+        with pytest.raises(CommandError):
+            call_command('check_counters')
+        call_command('check_counters', '--repair')
+        assert find_drift() == {Title: [], Review: []}
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 2
+        call_command('check_counters')
+
+    def test_04_bulk_import(self, tmp_path):
+        for name, content in CSV_FILES.items():
+            (tmp_path / name).write_text(content, encoding='utf-8')
+        for _ in CsvImporter(tmp_path).load_all(TABLES):
+            pass
+        assert Review.objects.get(pk=1).comment_count == 1, (
+            'Проверьте, что загрузка из CSV пересчитывает `comment_count`.'
+        )
+        assert find_drift() == {Title: [], Review: []}
@@ -0,0 +1,97 @@
+import re
+
+import pytest
+from django.db import connection
+
+from api import metrics
+from tests.utils import asgi_get, create_reviews
+
+TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) SQL", serialize;dur=([\d.]+), '
+    r'render;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28RequestMetrics:
+
+    @pytest.fixture(autouse=True)
+    def clean_store(self, settings):
+        settings.DEBUG = False
+        settings.REQUEST_METRICS_SAMPLE_RATE = 1
+        settings.REQUEST_METRICS_SERVER_TIMING = True
+        metrics.store.clear()
+        yield settings
+        metrics.store.clear()
+
+    def test_01_server_timing(self, admin_client, admin, client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        metrics.store.clear()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?n=1'
+        response = client.get(url)
+        match = TIMING.fullmatch(response.get('Server-Timing', ''))
+        assert match, (
+            'Проверьте, что ответ содержит заголовок Server-Timing с '
+            'временем SQL, сериализации, рендеринга и общим временем.'
+        )
+        assert float(match[2]) > 0, (
+            'Проверьте, что время сериализации замеряется отдельно.'
+        )
+        assert int(match[1]) >= 2, (
+            'Проверьте, что SQL-запросы считаются и при DEBUG=False.'
+        )
+        assert metrics.record_query in connection.execute_wrappers
+
+    def test_02_endpoint_stats(self, admin_client, admin, client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        metrics.store.clear()
+        for number in range(3):
+            client.get(f'/api/v1/titles/?n={number}')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        client.get('/api/v1/no-such-page/')
+
+        stats = admin_client.get('/api/v1/stats/').json()['requests']
+        endpoints = stats['endpoints']
+        assert {'titles-list', 'reviews-list'} <= set(endpoints), (
+            'Проверьте, что метрики собираются по имени маршрута и '
+            'действию.'
+        )
+        titles_list = endpoints['titles-list']
+        assert titles_list['count'] == 3
+        assert titles_list['queries'] >= 1
+        assert titles_list['latency_ms'] > 0
+        assert titles_list['serialize_ms'] > 0
+        assert titles_list['render_ms'] > 0
+        assert sum(titles_list['histogram'].values()) == 3, (
+            'Проверьте, что гистограмма задержки учитывает все запросы.'
+        )
+        assert titles_list['p50_ms'] is None or (
+            titles_list['p50_ms'] <= titles_list['p99_ms']
+        )
+
+    def test_03_sampling(self, settings, client):
+        settings.REQUEST_METRICS_SAMPLE_RATE = 0
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что запросы вне выборки не замеряются.'
+        )
+        assert metrics.store.merged() == {}
+
+    def test_04_asgi(self, admin_client, admin):
+        create_reviews(admin_client, {admin: admin_client})
+        metrics.store.clear()
+        response = asgi_get('/api/v1/titles/?n=async')
+        match = TIMING.fullmatch(response.get('Server-Timing', ''))
+        assert match and int(match[1]) >= 1, (
+            'Проверьте, что SQL-запросы считаются и под ASGI.'
+        )
+        assert metrics.store.merged()['titles-list']['count'] == 1
+
+    def test_05_server_timing_opt_in(self, settings, client):
+        settings.REQUEST_METRICS_SERVER_TIMING = False
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что заголовок Server-Timing отправляется только '
+            'при REQUEST_METRICS_SERVER_TIMING.'
+        )
+        assert metrics.store.merged()['titles-list']['count'] == 1
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles, get_token_client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Ratings:
+
+    @staticmethod
+    def get_rating(title_id):
+        return Title.objects.values_list(
+            'rating_sum', 'rating_count'
+        ).get(pk=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'text', 5)
+        user_client = get_token_client(user)
+        review = create_single_review(
+            user_client, title_id, 'text', 5
+        ).json()
+        assert self.get_rating(title_id) == (10, 2)
+
+        url = f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+        response = user_client.patch(url, data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(title_id) == (15, 2), (
+            'Проверьте, что изменение оценки сдвигает сумму оценок '
+            'произведения на разницу.'
+        )
+
+        response = user_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(title_id) == (5, 1), (
+            'Проверьте, что удаление отзыва убирает его оценку из '
+            'рейтинга произведения.'
+        )
+
+    def test_02_rebuild_ratings(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'text', 5)
+        Title.objects.filter(pk=title_id).update(rating_sum=99)
+
+        call_command('rebuild_ratings')
+        assert self.get_rating(title_id) == (5, 1), (
+            'Проверьте, что команда rebuild_ratings исправляет '
+            'разошедшуюся сумму оценок.'
+        )
+        assert self.get_rating(titles[1]['id']) == (0, 0)
@@ -1,5 +1,10 @@
 from http import HTTPStatus
 
+from asgiref.sync import async_to_sync
+from django.contrib.auth.tokens import default_token_generator
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +310,28 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def get_token_client(user):
+    """Клиент с токеном, выданным эндпоинтом `/api/v1/auth/token/`."""
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.CREATED, (
+        'Проверьте, что POST-запрос к `/api/v1/auth/token/` с корректным '
+        'кодом подтверждения возвращает ответ со статусом 201.'
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=response.json()['token'])
+    return client
+
+
+def asgi_request(method, url, **kwargs):
+    async def send():
+        return await getattr(AsyncClient(), method)(url, **kwargs)
+    return async_to_sync(send)()
+
+
+def asgi_get(url, **headers):
+    return asgi_request('get', url, **headers)